@@ -0,0 +1,391 @@
+from utils import *
+from engine import GridMap, MAX_COST, cell_mask, neighbor_masks
+
+try:
+    import numpy as np
+except ImportError:  # optional: without NumPy the grid still works, only the vectorized passes are lost
+    np = None
+
+# maps a STATE_* code to 1 for barriers and 0 for everything else (used with bytes.translate)
+_BLOCKED_TABLE = bytes(1 if state == STATE_BARRIER else 0 for state in range(256))
+# maps a barrier layer byte (non-zero for barriers) to its STATE_* code
+_BARRIER_STATE_TABLE = bytes(STATE_BARRIER if value else STATE_EMPTY for value in range(256))
+
+
+class ArrayGrid:
+    """
+    Grid backend that keeps the state of every cell in one contiguous row-major bytearray of STATE_*
+    codes instead of a matrix of Spot objects. Creating it, clearing it and preparing it for a search
+    are single bulk operations, which matters on maps of millions of cells.
+
+    It exposes the same interface as `Grid` for the visualizer and the search algorithms, with cells
+    addressed by their (row, col) position.
+    """
+
+    def __init__(self, win: pygame.Surface | None, rows: int, cols: int, width: int, height: int):
+        """
+        Initialize an array-backed grid with the given number of rows and columns.
+        Args:
+            win (pygame.Surface | None): The Pygame surface where the grid will be drawn (None when headless).
+            rows (int): Number of rows in the grid.
+            cols (int): Number of columns in the grid.
+            width (int): Width of the window in pixels.
+            height (int): Height of the window in pixels.
+        """
+        self.win: pygame.Surface | None = win
+        self.rows: int = rows
+        self.cols: int = cols
+        self.width: int = width
+        self.height: int = height
+        self.states: bytearray = bytearray(rows * cols)  # STATE_EMPTY is 0
+        self.costs: bytearray = bytearray([1]) * (rows * cols)  # terrain cost of entering each cell
+        self._masks: bytearray | None = None  # neighbor masks, computed by update_neighbors()
+        self._edited: set[int] = set()  # cells whose barrier state changed since the masks were computed
+        self._dirty: set[int] = set()  # cells whose state changed since the last frame, for draw_dirty()
+        self._full_redraw: bool = True
+        # cached background with the empty cells, barriers and grid lines (see _static_layer)
+        self._static: pygame.Surface | None = None
+        self._static_edits: set[int] = set()  # barrier edits not yet applied to the cached layer
+        # bumped on every barrier edit and reset: search results cached for an older version are stale
+        self.version: int = 0
+        self._edit_listeners: list[callable] = []  # called with the flat index of every barrier edit
+
+    # ---- cell access ----
+    def get_state(self, row: int, col: int) -> int:
+        return self.states[row * self.cols + col]
+
+    def set_state(self, row: int, col: int, state: int) -> None:
+        cell = row * self.cols + col
+        if (state == STATE_BARRIER) != (self.states[cell] == STATE_BARRIER):
+            # passability changed
+            self.version += 1
+            for listener in self._edit_listeners:
+                listener(cell)
+            if self._masks is not None:
+                self._edited.add(cell)
+            if self._static is not None:
+                self._static_edits.add(cell)
+        if self.states[cell] != state:
+            self._dirty.add(cell)
+        self.states[cell] = state
+
+    def set_cost(self, row: int, col: int, cost: int) -> None:
+        """
+        Set the terrain cost of moving into the cell at (row, col).
+        Args:
+            cost (int): 1 for plain ground, up to engine.MAX_COST.
+        Returns:
+            None
+        """
+        if not 1 <= cost <= MAX_COST:
+            raise ValueError(f"terrain cost must be between 1 and {MAX_COST}, got {cost}")
+        cell = row * self.cols + col
+        if self.costs[cell] == cost:
+            return
+        self.costs[cell] = cost
+        self.version += 1  # costs change the search results, but not the neighbor masks
+        self._dirty.add(cell)
+        if self._static is not None:
+            self._static_edits.add(cell)
+
+    def get_cost(self, row: int, col: int) -> int:
+        return self.costs[row * self.cols + col]
+
+    def add_edit_listener(self, listener: callable) -> None:
+        """
+        Register a callable notified of barrier edits, e.g. an incremental planner.
+        Args:
+            listener (callable): Called as `listener(cell)` with the flat index of every cell that became
+                or stopped being a barrier.
+        Returns:
+            None
+        """
+        self._edit_listeners.append(listener)
+
+    def state_matrix(self):
+        """
+        Get the cell states as a (rows, cols) NumPy array sharing memory with the grid.
+        Returns:
+            numpy.ndarray: A uint8 view of `states`.
+        """
+        if np is None:
+            raise RuntimeError("state_matrix() requires NumPy")
+        return np.frombuffer(self.states, dtype=np.uint8).reshape(self.rows, self.cols)
+
+    # ---- search preparation ----
+    def blocked(self) -> bytearray:
+        """
+        Get the barrier layer of the grid, one byte per cell (1 for barriers).
+        """
+        return bytearray(self.states.translate(_BLOCKED_TABLE))
+
+    def update_neighbors(self) -> None:
+        """
+        Bring the neighbor masks up to date. The first call computes the whole grid in one vectorized
+        pass (when NumPy is available); later calls only patch the cells edited since then and their
+        four neighbors.
+        Returns:
+            None
+        """
+        if self._masks is not None:
+            if self._edited:
+                blocked = self.blocked()
+                rows, cols = self.rows, self.cols
+                affected = set()
+                for cell in self._edited:
+                    affected.add(cell)
+                    row, col = divmod(cell, cols)
+                    if row < rows - 1:
+                        affected.add(cell + cols)
+                    if row > 0:
+                        affected.add(cell - cols)
+                    if col < cols - 1:
+                        affected.add(cell + 1)
+                    if col > 0:
+                        affected.add(cell - 1)
+                for cell in affected:
+                    self._masks[cell] = cell_mask(rows, cols, blocked, cell)
+                self._edited.clear()
+            return
+        if np is None:
+            return  # GridMap falls back to bound and barrier checks
+        self._masks = neighbor_masks(self.rows, self.cols, self.blocked())
+        self._edited.clear()
+
+    def to_grid_map(self) -> GridMap:
+        """
+        Build the plain description of this grid used by the search engine.
+        Returns:
+            GridMap: The rows, columns, barrier cells, (if computed) neighbor masks and (if any cell costs
+                more than 1) terrain costs of the grid.
+        """
+        self.update_neighbors()
+        masks = bytes(self._masks) if self._masks is not None else None
+        costs = bytes(self.costs) if self.costs.count(1) != len(self.costs) else None
+        return GridMap(self.rows, self.cols, self.blocked(), masks, costs)
+
+    # ---- drawing ----
+    def _edge(self, index: int, count: int, size: int) -> int:
+        """
+        Get the pixel where cell `index` of `count` starts along an axis `size` pixels long. Cell edges
+        are spread proportionally (and rounded up) so that the cells fill the whole window and each
+        pixel belongs to the cell get_clicked_pos() maps it to.
+        """
+        return -(-index * size // count)
+
+    def draw_grid_lines(self, surface: pygame.Surface | None = None) -> None:
+        """
+        Draw the grid lines on the Pygame window.
+        Args:
+            surface (pygame.Surface | None): Where to draw them (defaults to the window).
+        Returns:
+            None
+        """
+        surface = surface or self.win
+        for col in range(self.cols):
+            y = self._edge(col, self.cols, self.height)
+            pygame.draw.line(surface, COLORS['GREY'], (0, y), (self.width, y))
+        for row in range(self.rows):
+            x = self._edge(row, self.rows, self.width)
+            pygame.draw.line(surface, COLORS['GREY'], (x, 0), (x, self.height))
+
+    def _draw_cell(self, surface: pygame.Surface, cell: int, color: tuple) -> pygame.Rect:
+        """
+        Draw one cell and the grid lines along its top and left edges.
+        Returns:
+            pygame.Rect: The area drawn, in surface coordinates.
+        """
+        row, col = divmod(cell, self.cols)
+        x = self._edge(row, self.rows, self.width)
+        y = self._edge(col, self.cols, self.height)
+        spot_width = self._edge(row + 1, self.rows, self.width) - x
+        spot_height = self._edge(col + 1, self.cols, self.height) - y
+        pygame.draw.rect(surface, color, (x, y, spot_width, spot_height))
+        pygame.draw.line(surface, COLORS['GREY'], (x, y), (x + spot_width, y))
+        pygame.draw.line(surface, COLORS['GREY'], (x, y), (x, y + spot_height))
+        return pygame.Rect(x, y, spot_width + 1, spot_height + 1)
+
+    def _static_layer(self) -> pygame.Surface:
+        """
+        Get the cached background with the empty cells, barriers and grid lines. It is rebuilt when
+        the window size changes or the grid is reset; barrier edits are patched into it cell by cell.
+        Returns:
+            pygame.Surface: The static layer, the size of the window.
+        """
+        if self._static is None or self._static.get_size() != self.win.get_size():
+            self._static = pygame.Surface(self.win.get_size())
+            self._static.fill(STATE_COLORS[STATE_EMPTY])
+            if self.costs.count(1) != len(self.costs):
+                costs = self.costs
+                for cell in range(len(costs)):
+                    if costs[cell] != 1:
+                        self._draw_cell(self._static, cell, terrain_color(costs[cell]))
+            for cell in self._cells_in(lambda m: m == STATE_BARRIER):
+                self._draw_cell(self._static, cell, STATE_COLORS[STATE_BARRIER])
+            self.draw_grid_lines(self._static)
+            self._static_edits.clear()
+        elif self._static_edits:
+            for cell in self._static_edits:
+                self._draw_cell(self._static, cell, self._static_color(cell))
+            self._static_edits.clear()
+        return self._static
+
+    def _static_color(self, cell: int) -> tuple:
+        """
+        Get the color of a cell in the static layer: a barrier, or empty ground shaded by its terrain cost.
+        """
+        if self.states[cell] == STATE_BARRIER:
+            return STATE_COLORS[STATE_BARRIER]
+        return terrain_color(self.costs[cell])
+
+    def _cells_in(self, predicate) -> list[int]:
+        """
+        Get the cells whose state matches `predicate`, vectorized when NumPy is available.
+        """
+        if np is not None:
+            return np.flatnonzero(predicate(self.state_matrix())).tolist()
+        return [cell for cell, state in enumerate(self.states) if predicate(state)]
+
+    def draw(self) -> None:
+        """
+        Draw the grid on the Pygame window: the cached static layer is blitted, then only the cells
+        with a search, start or end state are drawn over it.
+        Returns:
+            None
+        """
+        self.win.blit(self._static_layer(), (0, 0))
+        states = self.states
+        for cell in self._cells_in(lambda m: (m != STATE_EMPTY) & (m != STATE_BARRIER)):
+            self._draw_cell(self.win, cell, STATE_COLORS[states[cell]])
+        self._dirty.clear()
+        self._full_redraw = False
+
+    def resize(self, win: pygame.Surface, width: int, height: int) -> None:
+        """
+        Move the grid to a new surface and size. The static layer is rebuilt on the next draw.
+        Returns:
+            None
+        """
+        self.win = win
+        self.width = width
+        self.height = height
+        self._static = None
+        self._full_redraw = True
+
+    def invalidate(self) -> None:
+        """
+        Force the next draw_dirty() call to redraw the whole grid.
+        Returns:
+            None
+        """
+        self._full_redraw = True
+
+    def mark_drawn(self) -> None:
+        """
+        Forget the changes since the last frame, after the whole grid was drawn by other means
+        (e.g. renderer.PaletteRenderer), so they are not kept around for draw_dirty().
+        Returns:
+            None
+        """
+        self._dirty.clear()
+
+    def draw_dirty(self) -> list[pygame.Rect]:
+        """
+        Redraw only the cells whose state changed since the last frame, with the grid lines along
+        their edges. Falls back to a full draw() when invalidated or when most of the grid changed.
+        Returns:
+            list[pygame.Rect]: The redrawn areas in display coordinates, for pygame.display.update().
+        """
+        ox, oy = self.win.get_abs_offset()
+        if self._full_redraw or len(self._dirty) * 4 > len(self.states):
+            self.draw()
+            return [pygame.Rect(ox, oy, self.width, self.height)]
+        rects = []
+        states = self.states
+        for cell in self._dirty:
+            state = states[cell]
+            color = self._static_color(cell) if state in (STATE_EMPTY, STATE_BARRIER) else STATE_COLORS[state]
+            rects.append(self._draw_cell(self.win, cell, color).move(ox, oy))
+        self._dirty.clear()
+        return rects
+
+    def get_clicked_pos(self, pos: tuple[int, int]) -> tuple[int, int]:
+        """
+        Get the row and column of the grid based on the mouse position.
+        Args:
+            pos (tuple[int, int]): The (x, y) position of the mouse click.
+        Returns:
+            tuple[int, int]: The (row, col) position of the clicked cell in the grid.
+        """
+        # proportional, like the cell edges in _draw_cell, so it also works when cells are smaller than a
+        # pixel (see renderer.PaletteRenderer)
+        x, y = pos
+        return x * self.rows // self.width, y * self.cols // self.height
+
+    # ---- bulk edits ----
+    def clear_path(self) -> None:
+        """
+        Reset every cell left by a search (open, closed, path) while keeping barriers, start and end.
+        Returns:
+            None
+        """
+        table = bytes(state if state in (STATE_BARRIER, STATE_START, STATE_END) else STATE_EMPTY
+                      for state in range(256))
+        self.states[:] = self.states.translate(table)
+        self._full_redraw = True
+
+    def reset(self) -> None:
+        """
+        Reset the grid to its initial state.
+        Returns:
+            None
+        """
+        if self._edit_listeners:
+            for cell in self._cells_in(lambda m: m == STATE_BARRIER):
+                for listener in self._edit_listeners:
+                    listener(cell)
+        self.states[:] = bytes(len(self.states))
+        self.costs[:] = bytearray([1]) * len(self.costs)
+        self._masks = None
+        self._edited.clear()
+        self._static = None
+        self._full_redraw = True
+        self.version += 1
+
+    def load_barriers(self, blocked) -> None:
+        """
+        Reset the grid and place the barriers of a layer, e.g. the `blocked` bytes of a loaded map,
+        in one bulk pass.
+        Args:
+            blocked (bytes-like): One byte per cell in row-major order, non-zero for barriers.
+        Returns:
+            None
+        """
+        self.reset()
+        self.states[:] = bytes(blocked).translate(_BARRIER_STATE_TABLE)
+        if self._edit_listeners:
+            for cell in self._cells_in(lambda m: m == STATE_BARRIER):
+                for listener in self._edit_listeners:
+                    listener(cell)
+        self.version += 1
+
+    def load_costs(self, costs) -> None:
+        """
+        Replace the terrain costs with a layer, e.g. the `costs` bytes of a loaded map, in one bulk pass.
+        Args:
+            costs (bytes-like): One byte per cell in row-major order, each between 1 and engine.MAX_COST.
+        Returns:
+            None
+        Raises:
+            ValueError: If the layer has the wrong size or a cost is out of range.
+        """
+        costs = bytes(costs)
+        if len(costs) != len(self.costs):
+            raise ValueError(f"expected {len(self.costs)} terrain costs, got {len(costs)}")
+        if costs and not 1 <= min(costs) <= max(costs) <= MAX_COST:
+            raise ValueError(f"terrain costs must be between 1 and {MAX_COST}")
+        self.costs[:] = costs
+        self._static = None
+        self._full_redraw = True
+        self.version += 1  # costs change the search results, but not the neighbor masks
+
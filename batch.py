@@ -0,0 +1,87 @@
+"""
+Batch queries: many start/goal pairs answered on one map by a pool of worker processes.
+
+The map is written once into a shared memory block (barrier layer, neighbor masks, terrain costs)
+that every worker maps read-only, so only the queries and the results cross process boundaries.
+Queries are sent in chunks to keep the per-task overhead small.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator
+
+import engine
+from engine import GridMap, SearchResult, neighbor_masks
+
+# set in every worker process by _attach()
+_shared: shared_memory.SharedMemory | None = None
+_gmap: GridMap | None = None
+
+
+def _attach(name: str, rows: int, cols: int, weighted: bool) -> None:
+    """
+    Worker initializer: map the shared grid and build a GridMap over it, without copying.
+    """
+    global _shared, _gmap
+    _shared = shared_memory.SharedMemory(name=name)
+    n = rows * cols
+    view = _shared.buf.toreadonly()
+    _gmap = GridMap(rows, cols, view[:n], view[n:2 * n], view[2 * n:3 * n] if weighted else None)
+
+
+def _solve_chunk(search: callable, chunk: list[tuple[int, tuple, tuple]], kwargs: dict) -> list[tuple[int, SearchResult]]:
+    return [(i, search(_gmap, start, goal, **kwargs)) for i, start, goal in chunk]
+
+
+def solve_batch(gmap: GridMap, queries: Iterable[tuple[tuple[int, int], tuple[int, int]]],
+                search: callable = engine.astar, workers: int | None = None, ordered: bool = True,
+                chunksize: int = 64, **kwargs) -> Iterator[tuple[int, SearchResult]]:
+    """
+    Answer start/goal queries on one map in parallel, streaming the results as they are ready.
+    Args:
+        gmap (GridMap): The map, e.g. from `Grid.to_grid_map()`; it is copied once into shared memory.
+        queries (Iterable): (start, goal) pairs of (row, col) positions.
+        search (callable): An engine search, e.g. `engine.astar` (must be a module-level function).
+        workers (int | None): Number of worker processes (defaults to the number of CPUs).
+        ordered (bool): If True, results come back in query order; otherwise as soon as a chunk is done.
+        chunksize (int): Queries sent to a worker per task.
+        **kwargs: Passed to every call of `search` (e.g. `limit` for `engine.dls`).
+    Returns:
+        Iterator[tuple[int, SearchResult]]: (query index, result) pairs.
+    """
+    queries = [(i, tuple(start), tuple(goal)) for i, (start, goal) in enumerate(queries)]
+    chunks = [queries[i:i + chunksize] for i in range(0, len(queries), chunksize)]
+    if not chunks:
+        return
+    n = gmap.rows * gmap.cols
+    masks = gmap.masks if gmap.masks is not None else neighbor_masks(gmap.rows, gmap.cols, gmap.blocked)
+    weighted = gmap.costs is not None
+    shared = shared_memory.SharedMemory(create=True, size=max((3 if weighted else 2) * n, 1))
+    try:
+        shared.buf[:n] = bytes(gmap.blocked)
+        shared.buf[n:2 * n] = bytes(masks)
+        if weighted:
+            shared.buf[2 * n:3 * n] = bytes(gmap.costs)
+        workers = min(workers or os.cpu_count() or 1, len(chunks))
+        with ProcessPoolExecutor(workers, initializer=_attach,
+                                 initargs=(shared.name, gmap.rows, gmap.cols, weighted)) as pool:
+            futures = [pool.submit(_solve_chunk, search, chunk, kwargs) for chunk in chunks]
+            try:
+                for future in (futures if ordered else as_completed(futures)):
+                    yield from future.result()
+            finally:
+                # stop early if the caller abandons the iterator or a search fails
+                for future in futures:
+                    future.cancel()
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+def solve_all(gmap: GridMap, queries: Iterable[tuple[tuple[int, int], tuple[int, int]]],
+              search: callable = engine.astar, workers: int | None = None, **kwargs) -> list[SearchResult]:
+    """
+    Answer start/goal queries on one map in parallel and collect the results in query order.
+    See `solve_batch` for the arguments.
+    """
+    return [result for _, result in solve_batch(gmap, queries, search, workers, ordered=True, **kwargs)]
@@ -0,0 +1,378 @@
+"""
+Headless benchmark of the search algorithms in `engine`.
+
+Maps are generated from a seed (open, random fill at several densities, mazes, rooms and weighted
+terrain), every algorithm answers the same fixed queries on each map, and the wall time, nodes
+expanded (and cells scanned by JPS jumps), peak frontier size, peak memory and path cost of every
+query are written to JSON and CSV.
+A previous JSON output can be given as a baseline to flag regressions. MovingAI scenario sets (.scen, with
+their .map files next to them) can be run instead of the generated maps.
+
+Usage:
+    python benchmark.py --sizes 50 200 --out results
+    python benchmark.py --sizes 50 200 --baseline results.json
+    python benchmark.py --scen arena.map.scen --algorithms astar jps
+"""
+import argparse
+import csv
+import functools
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import engine
+import mapio
+from engine import GridMap
+
+# name -> (search, largest map in cells it is run on by default)
+ALGORITHMS = {
+    'bfs': (engine.bfs, None),
+    'dfs': (engine.dfs, None),
+    'astar': (engine.astar, None),
+    'astar_h_call': (functools.partial(engine.astar, heuristic=engine.h_manhattan), None),  # no table
+    'astar_octile': (functools.partial(engine.astar, heuristic='octile'), None),
+    'ucs': (engine.ucs, None),
+    'greedy_search': (engine.greedy_search, None),
+    'jps': (engine.jps, None),
+    'bidirectional_bfs': (engine.bidirectional_bfs, None),
+    'bidirectional_astar': (engine.bidirectional_astar, None),
+    # exponential in the worst case: only small maps, and each query has a time budget
+    'ids': (engine.ids, 50 * 50),
+    'ida_star': (engine.ida_star, 50 * 50),
+    'ida_star_tt': (functools.partial(engine.ida_star, transpositions=1 << 20), 200 * 200),
+}
+BUDGETED = {'ids', 'ida_star', 'ida_star_tt'}
+
+MAP_TYPES = ('open', 'random10', 'random20', 'random30', 'maze', 'rooms', 'terrain')
+SIZES = (50, 200, 500, 1000, 2000)
+
+# results that may differ from the baseline by this factor before they count as a regression
+TIME_TOLERANCE = 1.25
+MEMORY_TOLERANCE = 1.25
+
+
+# ---- map generators ----
+def open_map(rows: int, cols: int, rng: random.Random) -> GridMap:
+    return GridMap(rows, cols)
+
+
+def random_map(rows: int, cols: int, rng: random.Random, density: float) -> GridMap:
+    """
+    Every cell is a barrier with probability `density`.
+    """
+    return GridMap(rows, cols, bytearray(1 if rng.random() < density else 0 for _ in range(rows * cols)))
+
+
+def maze_map(rows: int, cols: int, rng: random.Random) -> GridMap:
+    """
+    A perfect maze (one path between any two cells) carved by a randomized depth-first search on the
+    cells with even coordinates.
+    """
+    blocked = bytearray([1]) * (rows * cols)
+    blocked[0] = 0
+    stack = [(0, 0)]
+    while stack:
+        row, col = stack[-1]
+        options = [(row + dr, col + dc, dr // 2, dc // 2) for dr, dc in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 <= row + dr < rows and 0 <= col + dc < cols and blocked[(row + dr) * cols + col + dc]]
+        if not options:
+            stack.pop()
+            continue
+        n_row, n_col, hr, hc = rng.choice(options)
+        blocked[(row + hr) * cols + col + hc] = 0
+        blocked[n_row * cols + n_col] = 0
+        stack.append((n_row, n_col))
+    return GridMap(rows, cols, blocked)
+
+
+def rooms_map(rows: int, cols: int, rng: random.Random, room: int = 10) -> GridMap:
+    """
+    Square rooms of `room` cells separated by one-cell walls, with a door in each wall segment.
+    """
+    blocked = bytearray(rows * cols)
+    for row in range(room, rows, room + 1):
+        blocked[row * cols:(row + 1) * cols] = b'\x01' * cols
+    for col in range(room, cols, room + 1):
+        for row in range(rows):
+            blocked[row * cols + col] = 1
+    # one door per wall segment between two rooms
+    for row in range(room, rows, room + 1):
+        for start in range(0, cols, room + 1):
+            blocked[row * cols + min(start + rng.randrange(room), cols - 1)] = 0
+    for col in range(room, cols, room + 1):
+        for start in range(0, rows, room + 1):
+            blocked[min(start + rng.randrange(room), rows - 1) * cols + col] = 0
+    return GridMap(rows, cols, blocked)
+
+
+def terrain_map(rows: int, cols: int, rng: random.Random, max_cost: int = 9) -> GridMap:
+    """
+    10% barriers and a terrain cost from 1 to `max_cost` on every cell.
+    """
+    gmap = random_map(rows, cols, rng, 0.1)
+    gmap.costs = bytes(rng.randint(1, max_cost) for _ in range(rows * cols))
+    return gmap
+
+
+def make_map(kind: str, size: int, seed: int) -> GridMap:
+    """
+    Generate one of MAP_TYPES, `size` x `size`, from a seed.
+    """
+    rng = random.Random(f"{kind}-{size}-{seed}")
+    if kind == 'open':
+        return open_map(size, size, rng)
+    if kind.startswith('random'):
+        return random_map(size, size, rng, int(kind[len('random'):]) / 100)
+    if kind == 'maze':
+        return maze_map(size, size, rng)
+    if kind == 'rooms':
+        return rooms_map(size, size, rng)
+    if kind == 'terrain':
+        return terrain_map(size, size, rng)
+    raise ValueError(f"unknown map type {kind!r}")
+
+
+def make_queries(gmap: GridMap, count: int, seed: int) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    """
+    Pick `count` start/goal pairs among the free cells, from a seed. The first query always joins
+    the two free cells nearest to opposite corners, the worst case for most searches.
+    """
+    rng = random.Random(seed)
+    free = [cell for cell in range(len(gmap)) if not gmap.blocked[cell]]
+    if not free:
+        return []
+    queries = [(gmap.position(free[0]), gmap.position(free[-1]))]
+    while len(queries) < count:
+        queries.append((gmap.position(rng.choice(free)), gmap.position(rng.choice(free))))
+    return queries
+
+
+# ---- measurement ----
+class BudgetExceeded(Exception):
+    pass
+
+
+def _budget_observer(seconds: float) -> callable:
+    """
+    Observer that stops a search once it has run for `seconds`.
+    """
+    deadline = time.perf_counter() + seconds
+    steps = 0
+
+    def observe(event: int, cell: int) -> None:
+        nonlocal steps
+        steps += 1
+        if steps & 1023 == 0 and time.perf_counter() > deadline:
+            raise BudgetExceeded()
+
+    return observe
+
+
+def run_query(name: str, gmap: GridMap, start: tuple[int, int], goal: tuple[int, int],
+              budget: float, memory: bool) -> dict:
+    """
+    Run one query and measure it. Peak memory is measured in a second, untimed run, since
+    tracemalloc slows the search down.
+    Returns:
+        dict: The record for this query.
+    """
+    search, _ = ALGORITHMS[name]
+    kwargs = {'observer': _budget_observer(budget)} if name in BUDGETED else {}
+    record = {'status': 'ok'}
+    try:
+        began = time.perf_counter()
+        result = search(gmap, start, goal, **kwargs)
+        record['seconds'] = time.perf_counter() - began
+    except BudgetExceeded:
+        return {'status': 'timeout', 'seconds': budget}
+    record.update(found=result.found, cost=result.cost if result.found else None, expanded=result.expanded,
+                  generated=result.generated, peak_frontier=result.peak_frontier, scanned=result.scanned)
+    if memory:
+        if name in BUDGETED:
+            kwargs = {'observer': _budget_observer(budget * 10)}
+        tracemalloc.start()
+        try:
+            search(gmap, start, goal, **kwargs)
+            record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        except BudgetExceeded:
+            record['peak_memory'] = None
+        finally:
+            tracemalloc.stop()
+    return record
+
+
+def run(map_types, sizes, algorithms, queries: int = 5, seed: int = 0, budget: float = 10.0,
+        memory: bool = True, progress=None) -> list[dict]:
+    """
+    Run every algorithm on every map and query.
+    Args:
+        map_types (Iterable[str]): Names from MAP_TYPES.
+        sizes (Iterable[int]): Side lengths of the square maps.
+        algorithms (Iterable[str]): Names from ALGORITHMS. Algorithms with a size limit are skipped on
+            larger maps.
+        queries (int): Queries per map.
+        seed (int): Seed of the maps and queries.
+        budget (float): Time budget in seconds per query of the exponential searches (see BUDGETED).
+        memory (bool): Whether to measure peak memory.
+        progress (callable | None): Called with a line of text after every map.
+    Returns:
+        list[dict]: One record per (map, algorithm, query).
+    """
+    records = []
+    for kind in map_types:
+        for size in sizes:
+            gmap = make_map(kind, size, seed)
+            gmap.masks = engine.neighbor_masks(gmap.rows, gmap.cols, gmap.blocked)
+            for q, (start, goal) in enumerate(make_queries(gmap, queries, seed)):
+                for name in algorithms:
+                    limit = ALGORITHMS[name][1]
+                    if limit is not None and size * size > limit:
+                        continue
+                    record = {'map': kind, 'size': size, 'seed': seed, 'query': q, 'start': list(start),
+                              'goal': list(goal), 'algorithm': name}
+                    record.update(run_query(name, gmap, start, goal, budget, memory))
+                    records.append(record)
+            if progress is not None:
+                progress(f"{kind} {size}x{size} done")
+    return records
+
+
+def run_scenarios(path: str, algorithms, budget: float = 10.0, memory: bool = True, progress=None) -> list[dict]:
+    """
+    Run every algorithm on the queries of a MovingAI scenario set.
+    Args:
+        path (str): The .scen file. The maps it names are looked up next to it.
+        algorithms (Iterable[str]): Names from ALGORITHMS. Algorithms with a size limit are skipped on
+            larger maps.
+        budget (float): Time budget in seconds per query of the exponential searches (see BUDGETED).
+        memory (bool): Whether to measure peak memory.
+        progress (callable | None): Called with a line of text after every map.
+    Returns:
+        list[dict]: One record per (query, algorithm); `query` is the line order in the file and
+            `scenario` the file name, so sets that share a map keep apart in baselines.
+    """
+    records = []
+    maps: dict[str, GridMap] = {}
+    scenarios = mapio.read_scenarios(path)
+    for q, scenario in enumerate(scenarios):
+        gmap = maps.get(scenario.map)
+        if gmap is None:
+            folder = os.path.dirname(path)
+            map_path = os.path.join(folder, scenario.map)
+            if not os.path.exists(map_path):  # map names often carry the folder layout of the original set
+                map_path = os.path.join(folder, os.path.basename(scenario.map))
+            gmap = maps[scenario.map] = mapio.load_map(map_path).gmap
+            gmap.masks = engine.neighbor_masks(gmap.rows, gmap.cols, gmap.blocked)
+        for name in algorithms:
+            limit = ALGORITHMS[name][1]
+            if limit is not None and gmap.rows * gmap.cols > limit:
+                continue
+            record = {'scenario': os.path.basename(path), 'map': os.path.basename(scenario.map),
+                      'size': max(gmap.rows, gmap.cols), 'seed': None,
+                      'query': q, 'start': list(scenario.start), 'goal': list(scenario.goal), 'algorithm': name,
+                      'bucket': scenario.bucket}
+            record.update(run_query(name, gmap, scenario.start, scenario.goal, budget, memory))
+            records.append(record)
+        if progress is not None and (q + 1 == len(scenarios) or scenarios[q + 1].map != scenario.map):
+            progress(f"{scenario.map} done")
+    return records
+
+
+# ---- output and baselines ----
+FIELDS = ('scenario', 'map', 'size', 'seed', 'query', 'algorithm', 'status', 'found', 'cost', 'seconds',
+          'expanded', 'generated', 'peak_frontier', 'scanned', 'peak_memory', 'bucket')
+
+
+def write_json(path: str, records: list[dict], args: dict) -> None:
+    with open(path, 'w') as f:
+        json.dump({'python': platform.python_version(), 'platform': platform.platform(), 'args': args,
+                   'records': records}, f, indent=1)
+
+
+def write_csv(path: str, records: list[dict]) -> None:
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def compare(records: list[dict], baseline: list[dict]) -> list[str]:
+    """
+    Compare results against a baseline run with the same maps and queries.
+    A query regresses when it now fails or times out, finds a different path cost (optimal searches
+    must not change their cost), expands more nodes, or gets slower or bigger than the tolerances.
+    Returns:
+        list[str]: One line per regression.
+    """
+    def key(r: dict) -> tuple:
+        # `scenario` is only set by run_scenarios: two scenario sets can query the same map
+        return r.get('scenario'), r['map'], r['size'], r['seed'], r['query'], r['algorithm']
+
+    old = {key(r): r for r in baseline}
+    problems = []
+    for r in records:
+        b = old.get(key(r))
+        if b is None or b['status'] != 'ok':
+            continue
+        where = "{}{} {}x{} q{} {}".format(r['scenario'] + ' ' if r.get('scenario') else '', r['map'], r['size'],
+                                           r['size'], r['query'], r['algorithm'])
+        if r['status'] != 'ok':
+            problems.append(f"{where}: {r['status']}")
+            continue
+        if r['found'] != b['found'] or r['cost'] != b['cost']:
+            problems.append(f"{where}: result changed from {b['cost']} to {r['cost']}")
+        if r['expanded'] > b['expanded']:
+            problems.append(f"{where}: expanded {b['expanded']} -> {r['expanded']}")
+        # very short queries are too noisy to compare
+        if r['seconds'] > TIME_TOLERANCE * b['seconds'] and r['seconds'] - b['seconds'] > 0.005:
+            problems.append(f"{where}: {b['seconds']:.4f}s -> {r['seconds']:.4f}s")
+        if (r.get('peak_memory') and b.get('peak_memory')
+                and r['peak_memory'] > MEMORY_TOLERANCE * b['peak_memory']):
+            problems.append(f"{where}: peak memory {b['peak_memory']} -> {r['peak_memory']} bytes")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--maps', nargs='+', default=list(MAP_TYPES), choices=MAP_TYPES)
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES))
+    parser.add_argument('--algorithms', nargs='+', default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    parser.add_argument('--queries', type=int, default=5, help="queries per map")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=10.0, help="seconds per query for ids and the ida_star variants")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory measurement")
+    parser.add_argument('--out', default='benchmark', help="output path, without the .json/.csv extension")
+    parser.add_argument('--baseline', help="JSON output of a previous run to compare against")
+    parser.add_argument('--scen', nargs='+', help="MovingAI scenario files to run instead of the generated maps")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:  # read first: the new results may overwrite it
+        with open(args.baseline) as f:
+            baseline = json.load(f)['records']
+    progress = lambda line: print(line, file=sys.stderr)
+    if args.scen:
+        records = [record for path in args.scen
+                   for record in run_scenarios(path, args.algorithms, args.budget, not args.no_memory, progress)]
+    else:
+        records = run(args.maps, args.sizes, args.algorithms, args.queries, args.seed, args.budget,
+                      not args.no_memory, progress=progress)
+    write_json(args.out + '.json', records, vars(args))
+    write_csv(args.out + '.csv', records)
+    print(f"{len(records)} results written to {args.out}.json and {args.out}.csv")
+    if baseline is not None:
+        problems = compare(records, baseline)
+        for line in problems:
+            print("REGRESSION", line)
+        if problems:
+            return 1
+        print("no regressions against", args.baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import functools
+import hashlib
+from array import array
+from collections import OrderedDict
+
+from engine import GridMap, SearchResult
+
+
+class PathCache:
+    """
+    Least-recently-used cache of search results, keyed by (grid version, algorithm, start, end).
+
+    The grid version is a counter that `Grid` and `ArrayGrid` bump on every barrier edit and reset
+    (see `Grid.version`), or a content digest of a GridMap (see `grid_digest`). Entries for an edited
+    grid are therefore never hit again and simply age out of the cache.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        """
+        Initialize an empty cache.
+        Args:
+            maxsize (int): Number of results kept before the least recently used one is evicted.
+        """
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(version, algo: str, start: tuple[int, int], end: tuple[int, int]) -> tuple:
+        return version, algo, tuple(start), tuple(end)
+
+    def get(self, key: tuple):
+        """
+        Look up a result and mark it as recently used.
+        Args:
+            key (tuple): A key built by `PathCache.key`.
+        Returns:
+            The cached value, or None on a miss.
+        """
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple, value) -> None:
+        """
+        Store a result, evicting the least recently used one if the cache is full.
+        Args:
+            key (tuple): A key built by `PathCache.key`.
+            value: The result to store (not None).
+        Returns:
+            None
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def grid_digest(gmap: GridMap) -> bytes:
+    """
+    Get a content digest of a grid map, usable as the version in cache keys when the map does not come
+    from a live grid (e.g. in batch jobs).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(gmap.rows.to_bytes(4, 'little'))
+    h.update(gmap.cols.to_bytes(4, 'little'))
+    h.update(bytes(gmap.blocked))
+    if gmap.costs is not None:
+        h.update(bytes(gmap.costs))
+    return h.digest()
+
+
+def _key_value(value):
+    """
+    Make a search argument usable in a cache key. Hashable values are used as they are; per-cell tables
+    (lists, arrays) are replaced by a digest of their contents, so editing a table in place is not a
+    stale hit.
+    Raises:
+        TypeError: If the value is neither hashable nor a table of numbers.
+    """
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        pass
+    try:
+        view = memoryview(value)
+    except TypeError:
+        try:
+            view = memoryview(array('d', value))
+        except TypeError:
+            raise TypeError(f"cannot cache a search with a {type(value).__name__} argument: "
+                            f"it is neither hashable nor a table of numbers") from None
+    h = hashlib.blake2b(view.tobytes(), digest_size=16)
+    return 'table', view.format, h.digest()
+
+
+def cached_search(cache: PathCache, search: callable, gmap: GridMap, start: tuple[int, int],
+                  goal: tuple[int, int], version=None, **kwargs) -> SearchResult:
+    """
+    Run an engine search through the cache. Hits return the stored result without emitting events.
+    Args:
+        cache (PathCache): The cache to use.
+        search (callable): An engine search, e.g. `engine.astar`, or a `functools.partial` of one (its
+            bound arguments are part of the key).
+        gmap (GridMap): The map to search.
+        start (tuple[int, int]): The (row, col) start position.
+        goal (tuple[int, int]): The (row, col) goal position.
+        version: The grid version; defaults to `grid_digest(gmap)`.
+        **kwargs: Passed to the search (and part of the key). Per-cell tables are keyed by their contents.
+    Returns:
+        SearchResult: The cached or freshly computed result.
+    Raises:
+        TypeError: If an argument can be neither hashed nor digested as a table.
+    """
+    if version is None:
+        version = grid_digest(gmap)
+    func, args, options = search, (), kwargs
+    if isinstance(search, functools.partial):
+        func, args, options = search.func, search.args, {**search.keywords, **kwargs}
+    algo = getattr(func, '__name__', None) or repr(func)
+    if args or options:
+        algo = (algo, tuple(_key_value(arg) for arg in args),
+                tuple((name, _key_value(value)) for name, value in sorted(options.items())))
+    key = PathCache.key(version, algo, start, goal)
+    result = cache.get(key)
+    if result is None:
+        result = search(gmap, start, goal, **kwargs)
+        cache.put(key, result)
+    return result
@@ -0,0 +1,1068 @@
+"""
+Headless search engine.
+
+The algorithms in this module work on a plain grid description (`GridMap`) and never touch pygame,
+so they can run on machines without a display. Cells are addressed by a flat index
+(`row * cols + col`); start and goal are given as (row, col) tuples.
+
+A visualizer can follow a search by passing an `observer` callable. It is called as
+`observer(event, cell)` with one of the EVENT_* codes below and the flat index of the cell.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from dataclasses import dataclass, field
+import math
+import re
+from frontier import BucketFrontier, HeapFrontier
+
+try:
+    import numpy as np
+except ImportError:  # optional: distance_field falls back to a pure Python flood fill
+    np = None
+
+# ---- observer events ----
+EVENT_STEP = 0   # one iteration of the main loop (a good moment for the visualizer to redraw)
+EVENT_OPEN = 1   # cell pushed on the frontier
+EVENT_CLOSE = 2  # cell expanded
+EVENT_PATH = 3   # cell is part of the final path (sent from the goal side towards the start)
+EVENT_RESET = 4  # cell is back to unvisited (iterative deepening searches)
+
+# ---- neighbor mask bits (one bit per passable direction, in GridMap.neighbors order) ----
+MASK_DOWN = 1
+MASK_UP = 2
+MASK_RIGHT = 4
+MASK_LEFT = 8
+
+MAX_COST = 255  # highest terrain cost: costs are stored one byte per cell
+
+
+class GridMap:
+    def __init__(self, rows: int, cols: int, blocked: bytearray | None = None, masks: bytes | None = None,
+                 costs: bytes | None = None):
+        """
+        Initialize a plain, 4-connected grid description.
+        Args:
+            rows (int): Number of rows in the grid.
+            cols (int): Number of columns in the grid.
+            blocked (bytearray | None): One byte per cell in row-major order, non-zero for barriers.
+                If None, the grid starts empty.
+            masks (bytes | None): Optional precomputed neighbor masks, one byte of MASK_* bits per cell
+                (see `neighbor_masks`). When given, `neighbors` reads them instead of checking bounds
+                and barriers; they must be recomputed if `blocked` changes.
+            costs (bytes | None): Optional terrain layer, one byte per cell: the cost (1 to MAX_COST) of
+                moving into the cell. If None, every move costs 1. Only `ucs` and `astar` minimize it;
+                the other searches ignore it, but every `SearchResult.cost` is measured with it.
+        """
+        if blocked is None:
+            blocked = bytearray(rows * cols)
+        if len(blocked) != rows * cols:
+            raise ValueError(f"expected {rows * cols} cells, got {len(blocked)}")
+        if masks is not None and len(masks) != rows * cols:
+            raise ValueError(f"expected {rows * cols} neighbor masks, got {len(masks)}")
+        if costs is not None:
+            if len(costs) != rows * cols:
+                raise ValueError(f"expected {rows * cols} terrain costs, got {len(costs)}")
+            if 0 in costs:
+                raise ValueError("terrain costs must be at least 1")
+        self.rows: int = rows
+        self.cols: int = cols
+        self.blocked: bytearray = blocked
+        self.masks: bytes | None = masks
+        self.costs: bytes | None = costs
+        # neighbor offsets for each of the 16 possible masks
+        self._offsets: tuple[tuple[int, ...], ...] = tuple(
+            tuple(d for bit, d in ((MASK_DOWN, cols), (MASK_UP, -cols), (MASK_RIGHT, 1), (MASK_LEFT, -1)) if m & bit)
+            for m in range(16)
+        )
+
+    @classmethod
+    def from_strings(cls, lines: list[str], wall: str = '#') -> "GridMap":
+        """
+        Build a grid from text rows, e.g. ["..#", "..."]. Every `wall` character is a barrier.
+        Args:
+            lines (list[str]): The rows of the grid, all of the same length.
+            wall (str): The character used for barriers.
+        Returns:
+            GridMap: The parsed grid.
+        """
+        rows = len(lines)
+        cols = len(lines[0]) if rows else 0
+        blocked = bytearray(1 if ch == wall else 0 for line in lines for ch in line)
+        return cls(rows, cols, blocked)
+
+    def __len__(self) -> int:
+        return self.rows * self.cols
+
+    def index(self, row: int, col: int) -> int:
+        """
+        Get the flat index of the cell at (row, col).
+        """
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise IndexError(f"cell {(row, col)} is outside a {self.rows}x{self.cols} grid")
+        return row * self.cols + col
+
+    def position(self, cell: int) -> tuple[int, int]:
+        """
+        Get the (row, col) position of a flat cell index.
+        """
+        return divmod(cell, self.cols)
+
+    def is_blocked(self, cell: int) -> bool:
+        return bool(self.blocked[cell])
+
+    def neighbors(self, cell: int) -> list[int]:
+        """
+        Get the passable neighbors of a cell, in the order DOWN, UP, RIGHT, LEFT.
+        Args:
+            cell (int): Flat index of the cell.
+        Returns:
+            list[int]: Flat indices of the passable neighbors.
+        """
+        if self.masks is not None:
+            return [cell + d for d in self._offsets[self.masks[cell]]]
+        cols = self.cols
+        blocked = self.blocked
+        row, col = divmod(cell, cols)
+        out = []
+        if row < self.rows - 1 and not blocked[cell + cols]:
+            out.append(cell + cols)
+        if row > 0 and not blocked[cell - cols]:
+            out.append(cell - cols)
+        if col < cols - 1 and not blocked[cell + 1]:
+            out.append(cell + 1)
+        if col > 0 and not blocked[cell - 1]:
+            out.append(cell - 1)
+        return out
+
+
+def cell_mask(rows: int, cols: int, blocked: bytearray, cell: int) -> int:
+    """
+    Compute the neighbor mask of one cell: a MASK_* bit for every passable neighbor (0 for barriers).
+    """
+    if blocked[cell]:
+        return 0
+    row, col = divmod(cell, cols)
+    m = 0
+    if row < rows - 1 and not blocked[cell + cols]:
+        m |= MASK_DOWN
+    if row > 0 and not blocked[cell - cols]:
+        m |= MASK_UP
+    if col < cols - 1 and not blocked[cell + 1]:
+        m |= MASK_RIGHT
+    if col > 0 and not blocked[cell - 1]:
+        m |= MASK_LEFT
+    return m
+
+
+def neighbor_masks(rows: int, cols: int, blocked: bytearray) -> bytearray:
+    """
+    Compute the neighbor mask of every cell, in one vectorized pass when NumPy is available.
+    Args:
+        rows (int): Number of rows in the grid.
+        cols (int): Number of columns in the grid.
+        blocked (bytearray): One byte per cell, non-zero for barriers.
+    Returns:
+        bytearray: One byte of MASK_* bits per cell.
+    """
+    if np is None:
+        return bytearray(cell_mask(rows, cols, blocked, cell) for cell in range(rows * cols))
+    free = np.frombuffer(bytes(blocked), dtype=np.uint8).reshape(rows, cols) == 0
+    masks = np.zeros((rows, cols), dtype=np.uint8)
+    masks[:-1, :] |= free[1:, :] * np.uint8(MASK_DOWN)
+    masks[1:, :] |= free[:-1, :] * np.uint8(MASK_UP)
+    masks[:, :-1] |= free[:, 1:] * np.uint8(MASK_RIGHT)
+    masks[:, 1:] |= free[:, :-1] * np.uint8(MASK_LEFT)
+    masks *= free  # barriers have no neighbors
+    return bytearray(masks.tobytes())
+
+
+@dataclass
+class SearchResult:
+    found: bool
+    path: list[tuple[int, int]] = field(default_factory=list)  # (row, col) from start to goal, inclusive
+    cost: float = math.inf  # sum of edge costs along `path`
+    expanded: int = 0       # cells taken off the frontier and expanded
+    generated: int = 0      # cells pushed on the frontier
+    stale_avoided: int = 0  # outdated frontier entries (decrease-key) that were never popped
+    peak_frontier: int = 0  # largest number of cells waiting on the frontier at once
+    stale_skipped: int = 0  # outdated frontier entries popped and thrown away
+    scanned: int = 0        # cells stepped over between jump points, not expanded themselves (JPS)
+
+
+def h_manhattan(gmap: GridMap, cell: int, goal: int) -> float:
+    r1, c1 = divmod(cell, gmap.cols)
+    r2, c2 = divmod(goal, gmap.cols)
+    return float(abs(r1 - r2) + abs(c1 - c2))
+
+
+def h_euclidean(gmap: GridMap, cell: int, goal: int) -> float:
+    r1, c1 = divmod(cell, gmap.cols)
+    r2, c2 = divmod(goal, gmap.cols)
+    return float(math.hypot(r1 - r2, c1 - c2))
+
+
+def h_octile(gmap: GridMap, cell: int, goal: int) -> float:
+    r1, c1 = divmod(cell, gmap.cols)
+    r2, c2 = divmod(goal, gmap.cols)
+    dr, dc = abs(r1 - r2), abs(c1 - c2)
+    return max(dr, dc) + (math.sqrt(2) - 1) * min(dr, dc)
+
+
+# ---- heuristic tables ----
+# Named heuristics. All of them are admissible and consistent for 4-connected moves; Euclidean and
+# octile are weaker than Manhattan here, octile being the distance of 8-connected moves (as in the
+# MovingAI scenarios). They separate by axis, so a search only precomputes |r - goal row| per row and
+# |c - goal col| per column, O(rows + cols) per goal, and combines the two per cell.
+HEURISTICS = ('manhattan', 'euclidean', 'octile')
+_DIAGONAL = math.sqrt(2) - 1  # extra cost of a diagonal move over a straight one, in octile distance
+
+
+def _axis_distances(gmap: GridMap, goal: tuple[int, int]) -> tuple[list[float], list[float]]:
+    goal_row, goal_col = goal
+    return ([float(abs(r - goal_row)) for r in range(gmap.rows)],
+            [float(abs(c - goal_col)) for c in range(gmap.cols)])
+
+
+def _check_heuristic(kind: str) -> None:
+    if kind not in HEURISTICS:
+        raise ValueError(f"unknown heuristic {kind!r}, expected one of {', '.join(HEURISTICS)}")
+
+
+def heuristic_table(gmap: GridMap, goal: tuple[int, int], kind: str = 'manhattan') -> array:
+    """
+    Compute a named heuristic from every cell to `goal`, vectorized with NumPy when it is available.
+    The searches do not need it (they combine per-axis distances, see `astar`); it is a starting
+    point for user-supplied tables, e.g. a heuristic raised to math.inf in known dead ends.
+    Args:
+        gmap (GridMap): The grid.
+        goal (tuple[int, int]): The (row, col) position the heuristic estimates the distance to.
+        kind (str): One of HEURISTICS.
+    Returns:
+        array: One double per cell in row-major order.
+    Raises:
+        ValueError: If `kind` is not a known heuristic.
+    """
+    _check_heuristic(kind)
+    rows, cols = _axis_distances(gmap, goal)
+    if np is not None:
+        dr = np.array(rows)[:, None]
+        dc = np.array(cols)[None, :]
+        if kind == 'manhattan':
+            values = dr + dc
+        elif kind == 'euclidean':
+            values = np.sqrt(dr * dr + dc * dc)
+        else:
+            values = np.maximum(dr, dc) + _DIAGONAL * np.minimum(dr, dc)
+        return array('d', values.tobytes())
+    h = _heuristic_lookup(gmap, gmap.index(*goal), kind)
+    return array('d', map(h, range(len(gmap))))
+
+
+def _heuristic_lookup(gmap: GridMap, goal: int, heuristic) -> callable:
+    """
+    Resolve the `heuristic` argument of the informed searches into a one-argument `h(cell)`: per-axis
+    distance tables combined per cell for a heuristic name, a lookup in a per-cell sequence of values,
+    or a call of `heuristic(gmap, cell, goal)` for a function.
+    Raises:
+        ValueError: If the name is unknown or the table does not have one value per cell.
+    """
+    if isinstance(heuristic, str):
+        _check_heuristic(heuristic)
+        dr, dc = _axis_distances(gmap, gmap.position(goal))
+        cols = gmap.cols
+        if heuristic == 'manhattan':
+            def h(cell: int) -> float:
+                r, c = divmod(cell, cols)
+                return dr[r] + dc[c]
+        elif heuristic == 'euclidean':
+            dr2 = [d * d for d in dr]
+            dc2 = [d * d for d in dc]
+
+            def h(cell: int) -> float:
+                r, c = divmod(cell, cols)
+                return math.sqrt(dr2[r] + dc2[c])
+        else:
+            def h(cell: int) -> float:
+                r, c = divmod(cell, cols)
+                a, b = dr[r], dc[c]
+                return a + _DIAGONAL * b if a >= b else b + _DIAGONAL * a
+        return h
+    if callable(heuristic):
+        return lambda cell: heuristic(gmap, cell, goal)
+    if np is not None and isinstance(heuristic, np.ndarray):
+        heuristic = heuristic.ravel().tolist()  # Python floats, faster to index than NumPy scalars
+    if len(heuristic) != len(gmap):
+        raise ValueError(f"heuristic table has {len(heuristic)} values for {len(gmap)} cells")
+    return heuristic.__getitem__
+
+
+def _is_manhattan(heuristic) -> bool:
+    return heuristic is h_manhattan or (isinstance(heuristic, str) and heuristic == 'manhattan')
+
+
+# ---- distance fields ----
+UNREACHABLE = -1  # distance_field value of the cells that cannot reach the target
+_VECTOR_LAYER = 64  # frontier layers at least this large are expanded with NumPy
+
+
+def distance_field(gmap: GridMap, target: tuple[int, int]) -> array:
+    """
+    Compute the BFS distance from every cell to `target` in one flood fill, expanding a whole layer
+    of the frontier at a time. Large layers (open areas) are expanded in one vectorized step when
+    NumPy is available; small ones (corridors, mazes) in plain Python, where NumPy's per-call
+    overhead would dominate.
+    Args:
+        gmap (GridMap): The grid.
+        target (tuple[int, int]): The (row, col) position the distances are measured to.
+    Returns:
+        array: One signed int per cell in row-major order, UNREACHABLE for barriers and cut-off cells.
+    """
+    n, cols = len(gmap), gmap.cols
+    t = gmap.index(*target)
+    field = array('i', [UNREACHABLE]) * n
+    field[t] = 0
+    if np is not None:
+        dist = np.frombuffer(field, dtype=np.int32)  # shares memory with `field`
+        free = np.frombuffer(bytes(gmap.blocked), dtype=np.uint8) == 0
+    frontier = [t]  # a list, or a NumPy array while the layers are large
+    d = 0
+    while len(frontier):
+        d += 1
+        if np is not None and len(frontier) >= _VECTOR_LAYER:
+            cells = np.asarray(frontier, dtype=np.int64)
+            col = cells % cols
+            candidates = np.concatenate((cells[cells >= cols] - cols, cells[cells < n - cols] + cols,
+                                         cells[col > 0] - 1, cells[col < cols - 1] + 1))
+            frontier = np.unique(candidates[free[candidates] & (dist[candidates] == UNREACHABLE)])
+            dist[frontier] = d
+            continue
+        layer = []
+        for cell in (frontier.tolist() if np is not None and isinstance(frontier, np.ndarray) else frontier):
+            for neighbor in gmap.neighbors(cell):
+                if field[neighbor] == UNREACHABLE:
+                    field[neighbor] = d
+                    layer.append(neighbor)
+        frontier = layer
+    return field
+
+
+def field_heuristic(field: array) -> callable:
+    """
+    Turn a distance field into an A* heuristic (see `astar`). It is exact, so A* only expands cells on
+    shortest paths, but only valid for the goal the field was computed for.
+    """
+    def h_field(gmap: GridMap, cell: int, goal: int) -> float:
+        d = field[cell]
+        return math.inf if d == UNREACHABLE else float(d)
+    return h_field
+
+
+# ---- helpers ----
+def _endpoints(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int]) -> tuple[int, int]:
+    return gmap.index(*start), gmap.index(*goal)
+
+
+def _reconstruct(previous: dict[int, int | None], goal: int) -> list[int]:
+    cells = []
+    current = goal
+    while current is not None:
+        cells.append(current)
+        current = previous[current]
+    cells.reverse()
+    return cells
+
+
+def _found(gmap: GridMap, cells: list[int], observer, expanded: int, generated: int,
+           stale_avoided: int = 0, peak_frontier: int = 0, stale_skipped: int = 0) -> SearchResult:
+    """
+    Build the result for a successful search and report the path cells to the observer.
+    """
+    if observer is not None:
+        for cell in reversed(cells[1:-1]):
+            observer(EVENT_PATH, cell)
+    costs = gmap.costs
+    cost = len(cells) - 1 if costs is None else sum(costs[c] for c in cells[1:])
+    return SearchResult(True, [gmap.position(c) for c in cells], float(cost), expanded, generated,
+                        stale_avoided, peak_frontier, stale_skipped)
+
+
+# ---- uninformed searches ----
+def bfs(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], observer=None) -> SearchResult:
+    s, t = _endpoints(gmap, start, goal)
+    queue = deque([s])
+    previous: dict[int, int | None] = {s: None}
+    expanded = generated = peak = 0
+    while queue:
+        if len(queue) > peak:
+            peak = len(queue)
+        current = queue.popleft()
+        if observer is not None:
+            observer(EVENT_STEP, current)
+        if current == t:
+            return _found(gmap, _reconstruct(previous, t), observer, expanded, generated, peak_frontier=peak)
+        expanded += 1
+        for neighbor in gmap.neighbors(current):
+            if neighbor not in previous:
+                previous[neighbor] = current
+                queue.append(neighbor)
+                generated += 1
+                if observer is not None:
+                    observer(EVENT_OPEN, neighbor)
+        if observer is not None:
+            observer(EVENT_CLOSE, current)
+    return SearchResult(False, expanded=expanded, generated=generated, peak_frontier=peak)
+
+
+def dfs(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], observer=None) -> SearchResult:
+    s, t = _endpoints(gmap, start, goal)
+    stack = [s]
+    previous: dict[int, int | None] = {s: None}
+    expanded = generated = peak = 0
+    while stack:
+        if len(stack) > peak:
+            peak = len(stack)
+        current = stack.pop()
+        if observer is not None:
+            observer(EVENT_STEP, current)
+        if current == t:
+            return _found(gmap, _reconstruct(previous, t), observer, expanded, generated, peak_frontier=peak)
+        expanded += 1
+        for neighbor in gmap.neighbors(current):
+            if neighbor not in previous:
+                previous[neighbor] = current
+                stack.append(neighbor)
+                generated += 1
+                if observer is not None:
+                    observer(EVENT_OPEN, neighbor)
+        if observer is not None:
+            observer(EVENT_CLOSE, current)
+    return SearchResult(False, expanded=expanded, generated=generated, peak_frontier=peak)
+
+
+def _dls(gmap: GridMap, s: int, t: int, limit: int, observer, seen_depth: array | None = None,
+         previous: array | None = None) -> tuple[SearchResult, list[int], float]:
+    """
+    Depth-limited search from flat index `s` to `t`.
+    `seen_depth` and `previous` are per-cell arrays that can be reused between calls: `seen_depth` must
+    be UNREACHABLE for every cell on entry, which the caller restores by resetting the touched cells.
+    Returns:
+        tuple: The result, the cells touched (given a depth), and a lower bound on the length of any
+            path to `t` longer than `limit` (infinity if no cell was cut off by the limit).
+    """
+    if seen_depth is None:
+        seen_depth = array('i', [UNREACHABLE]) * len(gmap)
+        previous = array('i', [UNREACHABLE]) * len(gmap)
+    cols = gmap.cols
+    goal_row, goal_col = divmod(t, cols)
+    stack = [(s, 0)]
+    seen_depth[s] = 0
+    touched = [s]
+    expanded = generated = peak = 0
+    beyond = math.inf
+    while stack:
+        if len(stack) > peak:
+            peak = len(stack)
+        current, depth = stack.pop()
+        if observer is not None:
+            observer(EVENT_STEP, current)
+        if current == t:
+            cells = [t]
+            while cells[-1] != s:
+                cells.append(previous[cells[-1]])
+            cells.reverse()
+            return _found(gmap, cells, observer, expanded, generated, peak_frontier=peak), touched, beyond
+        if depth == limit:
+            # every path through this cell needs at least its Manhattan distance to the goal on top
+            row, col = divmod(current, cols)
+            bound = limit + abs(row - goal_row) + abs(col - goal_col)
+            if bound < beyond:
+                beyond = bound
+            continue
+        expanded += 1
+        nd = depth + 1
+        for nb in gmap.neighbors(current):
+            # allow (re)visit if we found a shallower depth within the limit
+            known = seen_depth[nb]
+            if known == UNREACHABLE or nd < known:
+                if known == UNREACHABLE:
+                    touched.append(nb)
+                seen_depth[nb] = nd
+                previous[nb] = current
+                stack.append((nb, nd))
+                generated += 1
+                if observer is not None:
+                    observer(EVENT_OPEN, nb)
+        if observer is not None:
+            observer(EVENT_CLOSE, current)
+    return SearchResult(False, expanded=expanded, generated=generated, peak_frontier=peak), touched, beyond
+
+
+def dls(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], limit: int | None = None,
+        observer=None) -> SearchResult:
+    """
+    Depth-Limited Search (iterative, depth-aware revisits).
+    If `limit` is None, we use a safe upper bound = rows * cols (covers any simple path).
+    """
+    s, t = _endpoints(gmap, start, goal)
+    if limit is None:
+        limit = gmap.rows * gmap.cols
+    result, _, _ = _dls(gmap, s, t, limit, observer)
+    return result
+
+
+def ids(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], max_depth: int | None = None,
+        observer=None) -> SearchResult:
+    """
+    Iterative Deepening DFS on top of DLS.
+    If max_depth is None, use 2 * (rows + cols) as the bound.
+
+    The first depth tried is the Manhattan distance to the goal, and after a failed iteration the
+    depths that cannot reach the goal are skipped: a longer path has to leave through one of the cells
+    cut off by the limit, so it is at least as long as the smallest limit + Manhattan distance among
+    them. If no cell was cut off the goal is out of reach and the search stops. The per-cell arrays
+    are allocated once and only the cells an iteration touched are reset.
+    """
+    s, t = _endpoints(gmap, start, goal)
+    if max_depth is None:
+        max_depth = 2 * (gmap.rows + gmap.cols)
+    seen_depth = array('i', [UNREACHABLE]) * len(gmap)
+    previous = array('i', [UNREACHABLE]) * len(gmap)
+    expanded = generated = peak = 0
+    depth = int(h_manhattan(gmap, s, t))
+    while depth <= max_depth:
+        result, touched, beyond = _dls(gmap, s, t, depth, observer, seen_depth, previous)
+        expanded += result.expanded
+        generated += result.generated
+        peak = max(peak, result.peak_frontier)
+        if result.found:
+            result.expanded, result.generated, result.peak_frontier = expanded, generated, peak
+            return result
+        for cell in touched:
+            seen_depth[cell] = UNREACHABLE
+        if observer is not None:
+            for cell in touched:
+                observer(EVENT_RESET, cell)
+        if beyond == math.inf:
+            break
+        depth = int(beyond)
+    return SearchResult(False, expanded=expanded, generated=generated, peak_frontier=peak)
+
+
+# ---- informed searches ----
+def astar(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], observer=None,
+          heuristic='manhattan', buckets: bool | None = None) -> SearchResult:
+    """
+    A* with a consistent heuristic. Ties on f are broken towards the lower h, i.e. the cells deeper
+    along a path, so an exact heuristic only expands a single shortest path. Moves cost the terrain
+    cost of the cell entered (see `GridMap`).
+    Args:
+        heuristic: A name from HEURISTICS, computed from per-axis distance tables built once for
+            the goal; a sequence with the value of every cell for this goal (math.inf where
+            it cannot be reached); or a function called as `heuristic(gmap, cell, goal)` with flat
+            indices, such as `h_manhattan` or `field_heuristic`.
+        buckets (bool | None): Keep the open set in a `BucketFrontier` keyed by f instead of a heap,
+            which needs a heuristic with integer values (Manhattan, ALT, distance fields). By default
+            it is used on maps with terrain costs when the heuristic is Manhattan distance.
+    """
+    s, t = _endpoints(gmap, start, goal)
+    costs = gmap.costs
+    if buckets is None:
+        buckets = costs is not None and _is_manhattan(heuristic)
+    h_of = _heuristic_lookup(gmap, t, heuristic)
+    # with consistent h, f grows by at most the costs of entering the two cells of an edge
+    open_set = BucketFrontier(2 * MAX_COST + 1) if buckets else HeapFrontier()
+    open_set.push(s, 0 if buckets else (0.0, 0.0))
+    previous: dict[int, int | None] = {s: None}
+    g_score: dict[int, float] = {s: 0.0}
+    closed: set[int] = set()
+    expanded = 0
+
+    while open_set:
+        _, current = open_set.pop()
+        if observer is not None:
+            observer(EVENT_STEP, current)
+        if current == t:
+            return _found(gmap, _reconstruct(previous, t), observer, expanded, open_set.pushes,
+                          open_set.stale_avoided, open_set.peak, open_set.stale_skipped)
+
+        closed.add(current)
+        expanded += 1
+        for neighbor in gmap.neighbors(current):
+            if neighbor in closed:
+                continue
+            tentative = g_score[current] + (1 if costs is None else costs[neighbor])
+            if tentative < g_score.get(neighbor, math.inf):
+                h = h_of(neighbor)
+                if h == math.inf:
+                    continue  # the goal cannot be reached from it (ALT, distance fields)
+                previous[neighbor] = current
+                g_score[neighbor] = tentative
+                # decrease-key if queued
+                open_set.push(neighbor, int(tentative + h) if buckets else (tentative + h, h))
+                if observer is not None:
+                    observer(EVENT_OPEN, neighbor)
+        if observer is not None:
+            observer(EVENT_CLOSE, current)
+
+    return SearchResult(False, expanded=expanded, generated=open_set.pushes,
+                        stale_avoided=open_set.stale_avoided, peak_frontier=open_set.peak,
+                        stale_skipped=open_set.stale_skipped)
+
+
+def ucs(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], observer=None,
+        buckets: bool | None = None) -> SearchResult:
+    """
+    Dijkstra/UCS on a decrease-key frontier (no stale pops). Moves cost the terrain cost of the cell
+    entered (see `GridMap`).
+    Args:
+        buckets (bool | None): Keep the open set in a `BucketFrontier` (Dial's algorithm) instead of a
+            heap. By default it is used on maps with terrain costs.
+    """
+    s, t = _endpoints(gmap, start, goal)
+    costs = gmap.costs
+    if buckets is None:
+        buckets = costs is not None
+    open_set = BucketFrontier(MAX_COST + 1) if buckets else HeapFrontier()
+    open_set.push(s, 0)
+    previous: dict[int, int | None] = {s: None}
+    g_score: dict[int, float] = {s: 0.0}
+    closed: set[int] = set()
+    expanded = 0
+
+    while open_set:
+        _, current = open_set.pop()
+        if observer is not None:
+            observer(EVENT_STEP, current)
+        if current == t:
+            return _found(gmap, _reconstruct(previous, t), observer, expanded, open_set.pushes,
+                          open_set.stale_avoided, open_set.peak, open_set.stale_skipped)
+
+        closed.add(current)
+        expanded += 1
+        for neighbor in gmap.neighbors(current):
+            if neighbor in closed:
+                continue
+            tentative = g_score[current] + (1 if costs is None else costs[neighbor])
+            if tentative < g_score.get(neighbor, math.inf):
+                previous[neighbor] = current
+                g_score[neighbor] = tentative
+                open_set.push(neighbor, int(tentative) if buckets else tentative)  # priority = g
+                if observer is not None:
+                    observer(EVENT_OPEN, neighbor)
+        if observer is not None:
+            observer(EVENT_CLOSE, current)
+
+    return SearchResult(False, expanded=expanded, generated=open_set.pushes,
+                        stale_avoided=open_set.stale_avoided, peak_frontier=open_set.peak,
+                        stale_skipped=open_set.stale_skipped)
+
+
+def greedy_search(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], observer=None,
+                  heuristic='manhattan') -> SearchResult:
+    """
+    Greedy best-first search: always expands the queued cell with the lowest heuristic value (see
+    `astar` for the `heuristic` argument). Fast, but the path is not necessarily the shortest.
+    """
+    s, t = _endpoints(gmap, start, goal)
+    h_of = _heuristic_lookup(gmap, t, heuristic)
+    open_set = HeapFrontier()
+    open_set.push(s, h_of(s))
+    previous: dict[int, int | None] = {s: None}
+    expanded = 0
+
+    while open_set:
+        _, current = open_set.pop()
+        if observer is not None:
+            observer(EVENT_STEP, current)
+        if current == t:
+            return _found(gmap, _reconstruct(previous, t), observer, expanded, open_set.pushes,
+                          peak_frontier=open_set.peak, stale_skipped=open_set.stale_skipped)
+
+        expanded += 1
+        for neighbor in gmap.neighbors(current):
+            if neighbor not in previous:
+                previous[neighbor] = current
+                open_set.push(neighbor, h_of(neighbor))
+                if observer is not None:
+                    observer(EVENT_OPEN, neighbor)
+        if observer is not None:
+            observer(EVENT_CLOSE, current)
+
+    return SearchResult(False, expanded=expanded, generated=open_set.pushes, peak_frontier=open_set.peak,
+                        stale_skipped=open_set.stale_skipped)
+
+
+def ida_star(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], observer=None,
+             heuristic='manhattan', transpositions: int | None = None) -> SearchResult:
+    """
+    IDA* with an admissible heuristic (a name, a table or a function, see `astar`). Cells are
+    evaluated again on every threshold, so a precomputed table saves the most here.
+
+    The depth-first search runs on an explicit stack, so the path length is not bound by the recursion
+    limit, and the cells of the current path are marked in a byte array for O(1) cycle checks.
+    Args:
+        transpositions (int | None): If set, remember the smallest g at which each cell was expanded
+            during the current threshold (up to this many cells) and skip later visits that reach it
+            with a g at least as large. Prunes the transpositions of open grids, paths stay optimal.
+    """
+    s, t = _endpoints(gmap, start, goal)
+    h_of = _heuristic_lookup(gmap, t, heuristic)
+    on_path = bytearray(len(gmap))
+    expanded = generated = peak = 0  # the frontier of IDA* is the current path
+
+    def iteration(threshold: float) -> tuple[bool, float, list[int]]:
+        # one depth-first pass bounded by `threshold`: returns (found, next threshold, path)
+        nonlocal expanded, generated, peak
+        best = {} if transpositions else None
+        path = [s]
+        children = [None]  # per path cell: iterator over its untried neighbors, None until visited
+        on_path[s] = 1
+        minimum = math.inf
+        while path:
+            current = path[-1]
+            pending = children[-1]
+            if pending is None:
+                if len(path) > peak:
+                    peak = len(path)
+                if observer is not None:
+                    observer(EVENT_STEP, current)
+                g = len(path) - 1
+                f = g + h_of(current)
+                if f > threshold:
+                    if f < minimum:
+                        minimum = f
+                    pending = ()
+                elif current == t:
+                    return True, f, path
+                elif best is not None and best.get(current, math.inf) <= g:
+                    pending = ()
+                else:
+                    if best is not None and (len(best) < transpositions or current in best):
+                        best[current] = g
+                    expanded += 1
+                    if observer is not None:
+                        observer(EVENT_CLOSE, current)
+                    pending = children[-1] = iter(gmap.neighbors(current))
+            neighbor = next((n for n in pending if not on_path[n]), None)
+            if neighbor is not None:
+                path.append(neighbor)
+                children.append(None)
+                on_path[neighbor] = 1
+                generated += 1
+                if observer is not None:
+                    observer(EVENT_OPEN, neighbor)
+                continue
+            # every neighbor tried: backtrack
+            path.pop()
+            children.pop()
+            on_path[current] = 0
+            if observer is not None and path:
+                observer(EVENT_RESET, current)
+        return False, minimum, []
+
+    threshold = h_of(s)
+    if threshold == math.inf:  # the heuristic already knows the goal is out of reach
+        return SearchResult(False)
+    while True:
+        found, threshold, path = iteration(threshold)
+        if found:
+            return _found(gmap, path, observer, expanded, generated, peak_frontier=peak)
+        if threshold == math.inf:
+            return SearchResult(False, expanded=expanded, generated=generated, peak_frontier=peak)
+        # continue with raised threshold
+
+
+_BARRIER_RUN = re.compile(rb'[^\x00]+')  # a run of consecutive barriers in a row of `GridMap.blocked`
+
+
+def jps(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], observer=None) -> SearchResult:
+    """
+    Jump Point Search for 4-connected, uniform-cost grids: A* over jump points instead of cells.
+
+    Among the shortest paths, the canonical ones take their vertical moves as early as possible.
+    A horizontal run therefore only turns at a forced neighbor (a vertical neighbor whose cell behind
+    is blocked), while a vertical run may turn at any cell, so every vertical step probes both
+    horizontal directions. Only the cells where a run has to stop or turn are pushed on the frontier.
+    Paths are optimal, with the same cost as `astar`.
+
+    Horizontal runs are not stepped cell by cell: the barrier runs of each row are indexed once (on
+    first use), and the next barrier and the next forced neighbor along a row are found by bisection,
+    so a probe is O(log cols). Vertical runs step cell by cell. `SearchResult.scanned` counts the
+    cells stepped over by the runs that reached a jump point or a barrier, probes excluded.
+    """
+    s, t = _endpoints(gmap, start, goal)
+    rows, cols, blocked = gmap.rows, gmap.cols, gmap.blocked
+    goal_row, goal_col = divmod(t, cols)
+    scanned = 0
+    barrier_runs: dict[int, tuple[list[int], list[int]]] = {}
+    turn_columns: dict[int, tuple[list[int], list[int]]] = {}
+
+    def free(r: int, c: int) -> bool:
+        return 0 <= r < rows and 0 <= c < cols and not blocked[r * cols + c]
+
+    def forced(r: int, c: int, dr: int, dc: int) -> bool:
+        # moving horizontally by dc into (r, c): is the vertical neighbor in direction dr forced?
+        return free(r + dr, c) and not free(r + dr, c - dc)
+
+    def runs(r: int) -> tuple[list[int], list[int]]:
+        # first and past-the-end columns of the barrier runs of row r, in order (none outside the grid)
+        found = barrier_runs.get(r)
+        if found is None:
+            spans = [m.span() for m in _BARRIER_RUN.finditer(bytes(blocked[r * cols:(r + 1) * cols]))] \
+                if 0 <= r < rows else []
+            found = barrier_runs[r] = [a for a, _ in spans], [b for _, b in spans]
+        return found
+
+    def turns(r: int) -> tuple[list[int], list[int]]:
+        # columns of row r with a forced neighbor when moving right and when moving left, in order:
+        # the free cell just past a barrier run of the row above or below
+        found = turn_columns.get(r)
+        if found is None:
+            right, left = set(), set()
+            for adjacent in (r - 1, r + 1):
+                starts, ends = runs(adjacent)
+                right.update(b for b in ends if b < cols)
+                left.update(a - 1 for a in starts if a > 0)
+            found = turn_columns[r] = sorted(right), sorted(left)
+        return found
+
+    def jump_horizontal(r: int, c: int, dc: int) -> tuple[int | None, int]:
+        # from the free cell (r, c): the jump point (or None at a barrier or the edge), cells stepped over
+        starts, ends = runs(r)
+        right, left = turns(r)
+        if dc > 0:
+            i = bisect_right(starts, c)
+            wall = starts[i] if i < len(starts) else cols
+            j = bisect_right(right, c)
+            stop = right[j] if j < len(right) else cols
+            if r == goal_row and c < goal_col < stop:
+                stop = goal_col
+            if stop >= wall:
+                return None, wall - c - 1
+            return r * cols + stop, stop - c
+        i = bisect_left(starts, c) - 1
+        wall = ends[i] - 1 if i >= 0 else -1
+        j = bisect_left(left, c) - 1
+        stop = left[j] if j >= 0 else -1
+        if r == goal_row and stop < goal_col < c:
+            stop = goal_col
+        if stop <= wall:
+            return None, c - wall - 1
+        return r * cols + stop, c - stop
+
+    def jump_vertical(r: int, c: int, dr: int) -> tuple[int | None, int]:
+        steps = 0
+        while True:
+            r += dr
+            if not free(r, c):
+                return None, steps
+            steps += 1
+            if ((r == goal_row and c == goal_col) or jump_horizontal(r, c, 1)[0] is not None
+                    or jump_horizontal(r, c, -1)[0] is not None):
+                return r * cols + c, steps
+
+    def directions(cell: int) -> list[tuple[int, int]]:
+        parent = previous[cell]
+        if parent is None:
+            return [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        r, c = divmod(cell, cols)
+        pr, pc = divmod(parent, cols)
+        if c == pc:  # reached by a vertical run: go on, or turn either way
+            dr = 1 if r > pr else -1
+            return [(dr, 0), (0, 1), (0, -1)]
+        dc = 1 if c > pc else -1  # reached by a horizontal run: go on, or turn where forced
+        return [(0, dc)] + [(dr, 0) for dr in (1, -1) if forced(r, c, dr, dc)]
+
+    open_set = HeapFrontier()
+    open_set.push(s, (0.0, 0.0))
+    previous: dict[int, int | None] = {s: None}
+    g_score: dict[int, float] = {s: 0.0}
+    closed: set[int] = set()
+    expanded = 0
+
+    while open_set:
+        _, current = open_set.pop()
+        if observer is not None:
+            observer(EVENT_STEP, current)
+        if current == t:
+            cells = [s]
+            jump_points = _reconstruct(previous, t)
+            for a, b in zip(jump_points, jump_points[1:]):
+                # consecutive jump points share a row or a column: fill in the straight run between them
+                if a % cols == b % cols:
+                    step = cols if b > a else -cols
+                else:
+                    step = 1 if b > a else -1
+                cells.extend(range(a + step, b + step, step))
+            result = _found(gmap, cells, observer, expanded, open_set.pushes, open_set.stale_avoided,
+                            open_set.peak, open_set.stale_skipped)
+            result.scanned = scanned
+            return result
+
+        closed.add(current)
+        expanded += 1
+        r, c = divmod(current, cols)
+        for dr, dc in directions(current):
+            jump_point, steps = jump_vertical(r, c, dr) if dr else jump_horizontal(r, c, dc)
+            scanned += steps
+            if jump_point is None or jump_point in closed:
+                continue
+            jr, jc = divmod(jump_point, cols)
+            tentative = g_score[current] + abs(jr - r) + abs(jc - c)
+            if tentative < g_score.get(jump_point, math.inf):
+                previous[jump_point] = current
+                g_score[jump_point] = tentative
+                h = h_manhattan(gmap, jump_point, t)
+                open_set.push(jump_point, (tentative + h, h))  # ties on f go to the lower h, as in `astar`
+                if observer is not None:
+                    observer(EVENT_OPEN, jump_point)
+        if observer is not None:
+            observer(EVENT_CLOSE, current)
+
+    return SearchResult(False, expanded=expanded, generated=open_set.pushes,
+                        stale_avoided=open_set.stale_avoided, peak_frontier=open_set.peak,
+                        stale_skipped=open_set.stale_skipped, scanned=scanned)
+
+
+# ---- bidirectional searches ----
+def _join(previous_f: dict[int, int | None], previous_b: dict[int, int | None], a: int, b: int) -> list[int]:
+    """
+    Join the two halves of a bidirectional search: start -> ... -> a (forward map), then
+    b -> ... -> goal (backward map). `a` and `b` are the same cell or neighbors.
+    """
+    cells = _reconstruct(previous_f, a)
+    current = b if b != a else previous_b[a]
+    while current is not None:
+        cells.append(current)
+        current = previous_b[current]
+    return cells
+
+
+def bidirectional_bfs(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], observer=None) -> SearchResult:
+    """
+    BFS grown from both ends, one layer at a time on the side with the smaller frontier.
+    The search stops at the first cell that touches the other side: a connection through a cell the
+    other side reached in an earlier layer would have been seen when one of its two ends was
+    generated, so every connection found in the current layer has the same, optimal, length.
+    """
+    s, t = _endpoints(gmap, start, goal)
+    if s == t:
+        return _found(gmap, [s], observer, 0, 0)
+    previous_f: dict[int, int | None] = {s: None}
+    previous_b: dict[int, int | None] = {t: None}
+    dist_f: dict[int, int] = {s: 0}
+    dist_b: dict[int, int] = {t: 0}
+    frontier_f, frontier_b = [s], [t]
+    expanded = generated = peak = 0
+
+    while frontier_f and frontier_b:
+        peak = max(peak, len(frontier_f) + len(frontier_b))
+        forward = len(frontier_f) <= len(frontier_b)
+        if forward:
+            frontier, previous, dist, other_dist = frontier_f, previous_f, dist_f, dist_b
+        else:
+            frontier, previous, dist, other_dist = frontier_b, previous_b, dist_b, dist_f
+        next_layer = []
+        for current in frontier:
+            if observer is not None:
+                observer(EVENT_STEP, current)
+            expanded += 1
+            d = dist[current] + 1
+            for neighbor in gmap.neighbors(current):
+                if neighbor in other_dist:
+                    a, b = (current, neighbor) if forward else (neighbor, current)
+                    return _found(gmap, _join(previous_f, previous_b, a, b), observer, expanded, generated,
+                                  peak_frontier=peak)
+                if neighbor not in previous:
+                    previous[neighbor] = current
+                    dist[neighbor] = d
+                    next_layer.append(neighbor)
+                    generated += 1
+                    if observer is not None:
+                        observer(EVENT_OPEN, neighbor)
+            if observer is not None:
+                observer(EVENT_CLOSE, current)
+        if forward:
+            frontier_f = next_layer
+        else:
+            frontier_b = next_layer
+
+    return SearchResult(False, expanded=expanded, generated=generated, peak_frontier=peak)
+
+
+def bidirectional_astar(gmap: GridMap, start: tuple[int, int], goal: tuple[int, int], observer=None) -> SearchResult:
+    """
+    A* grown from both ends, expanding the side with the smaller open set.
+
+    Both sides use the consistent average potential p(v) = (h(v, goal) - h(v, start)) / 2 (forward
+    key g + p, backward key g - p), which makes this a bidirectional Dijkstra on reduced edge costs:
+    with `mu` the best start-goal connection seen so far, the search can stop as soon as the two
+    lowest keys add up to at least `mu`. Ties on the key are broken towards the larger g and then
+    towards the start-goal line, without which both sides sweep the whole plateau of equal keys
+    (on open ground, every cell of the rectangle spanned by start and goal) before they meet.
+    """
+    s, t = _endpoints(gmap, start, goal)
+
+    start_row, start_col = start
+    dr, dc = goal[0] - start_row, goal[1] - start_col
+
+    def potential(cell: int) -> float:
+        return (h_manhattan(gmap, cell, t) - h_manhattan(gmap, cell, s)) / 2
+
+    def off_line(cell: int) -> int:
+        # how far a cell is from the straight start-goal line (cross product, unnormalized)
+        r, c = divmod(cell, gmap.cols)
+        return abs((r - start_row) * dc - (c - start_col) * dr)
+
+    open_f, open_b = HeapFrontier(), HeapFrontier()
+    open_f.push(s, (potential(s), 0.0, 0))
+    open_b.push(t, (-potential(t), 0.0, 0))
+    previous_f: dict[int, int | None] = {s: None}
+    previous_b: dict[int, int | None] = {t: None}
+    g_f: dict[int, float] = {s: 0.0}
+    g_b: dict[int, float] = {t: 0.0}
+    closed_f: set[int] = set()
+    closed_b: set[int] = set()
+    mu, meet = (0.0, s) if s == t else (math.inf, None)
+    expanded = 0
+
+    while open_f and open_b:
+        if open_f.peek()[0][0] + open_b.peek()[0][0] >= mu:
+            break
+        forward = len(open_f) <= len(open_b)
+        if forward:
+            open_set, previous, g_score, closed, other_g, sign = open_f, previous_f, g_f, closed_f, g_b, 1
+        else:
+            open_set, previous, g_score, closed, other_g, sign = open_b, previous_b, g_b, closed_b, g_f, -1
+        _, current = open_set.pop()
+        if observer is not None:
+            observer(EVENT_STEP, current)
+        closed.add(current)
+        expanded += 1
+        for neighbor in gmap.neighbors(current):
+            if neighbor in closed:
+                continue
+            tentative = g_score[current] + 1
+            if tentative < g_score.get(neighbor, math.inf):
+                previous[neighbor] = current
+                g_score[neighbor] = tentative
+                # ties on the key go to the larger g, then to the cell closer to the start-goal line,
+                # so on open ground both sides dive along that line and meet halfway
+                open_set.push(neighbor, (tentative + sign * potential(neighbor), -tentative, off_line(neighbor)))
+                if observer is not None:
+                    observer(EVENT_OPEN, neighbor)
+            if neighbor in other_g and g_score[neighbor] + other_g[neighbor] < mu:
+                mu, meet = g_score[neighbor] + other_g[neighbor], neighbor
+        if observer is not None:
+            observer(EVENT_CLOSE, current)
+
+    pushes = open_f.pushes + open_b.pushes
+    stale_avoided = open_f.stale_avoided + open_b.stale_avoided
+    peak = open_f.peak + open_b.peak  # upper bound: the two peaks need not coincide
+    stale_skipped = open_f.stale_skipped + open_b.stale_skipped
+    if meet is None:
+        return SearchResult(False, expanded=expanded, generated=pushes, stale_avoided=stale_avoided,
+                            peak_frontier=peak, stale_skipped=stale_skipped)
+    return _found(gmap, _join(previous_f, previous_b, meet, meet), observer, expanded, pushes, stale_avoided,
+                  peak, stale_skipped)
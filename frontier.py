@@ -0,0 +1,270 @@
+"""
+Frontier (open set) data structures shared by the best-first searches in `engine`.
+
+Unlike `queue.PriorityQueue` these are meant for a single thread and take no locks.
+"""
+import heapq
+
+
+class HeapFrontier:
+    """
+    Binary min-heap of cells keyed by priority, with decrease-key.
+
+    Decrease-key is done by pushing a fresh entry and invalidating the old one, but the stale entries
+    never reach the caller: `pop` drops them internally, and the heap is compacted when they make up
+    more than half of it, so there is at most one duplicate per live cell. Ties are broken in
+    insertion order (FIFO), like the `(priority, count, item)` tuples used with PriorityQueue.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, int]] = []
+        self._live: dict[int, tuple[float, int, int]] = {}  # cell -> its valid heap entry
+        self._order: int = 0
+        self.pushes: int = 0         # entries added to the heap
+        self.decreases: int = 0      # pushes that lowered the priority of an already queued cell
+        self.stale_skipped: int = 0  # outdated entries dropped by `pop`
+        self.stale_purged: int = 0   # outdated entries dropped by compaction, without being popped
+        self.peak: int = 0           # largest number of cells queued at once
+        self._removed: int = 0       # cells taken off by `remove`, whose entries became outdated
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __bool__(self) -> bool:
+        return bool(self._live)
+
+    def __contains__(self, cell: int) -> bool:
+        return cell in self._live
+
+    @property
+    def stale_avoided(self) -> int:
+        """
+        Number of outdated entries (one per decrease-key or `remove`) that were never popped: purged
+        by compaction, or still waiting in the queue. A lazy-deletion queue would have popped each of
+        them; the ones that did get popped are counted in `stale_skipped` instead.
+        """
+        return self.decreases + self._removed - self.stale_skipped
+
+    def priority(self, cell: int) -> float:
+        """
+        Get the current priority of a queued cell.
+        """
+        return self._live[cell][0]
+
+    def push(self, cell: int, priority: float) -> bool:
+        """
+        Insert a cell, or lower its priority if it is already queued.
+        Args:
+            cell (int): The cell to queue.
+            priority (float): Its priority (lower pops first).
+        Returns:
+            bool: False if the cell was already queued with a priority at least as good, True otherwise.
+        """
+        live = self._live.get(cell)
+        if live is not None:
+            if priority >= live[0]:
+                return False
+            self.decreases += 1
+        self._order += 1
+        entry = (priority, self._order, cell)
+        self._live[cell] = entry
+        if len(self._live) > self.peak:
+            self.peak = len(self._live)
+        heapq.heappush(self._heap, entry)
+        self.pushes += 1
+        if len(self._heap) > 2 * len(self._live) + 64:
+            self._compact()
+        return True
+
+    def peek(self) -> tuple[float, int]:
+        """
+        Get the queued cell with the lowest priority without removing it.
+        Returns:
+            tuple[float, int]: The (priority, cell) pair.
+        Raises:
+            IndexError: If the frontier is empty.
+        """
+        heap = self._heap
+        live = self._live
+        while live.get(heap[0][2]) is not heap[0]:
+            heapq.heappop(heap)
+            self.stale_skipped += 1
+        return heap[0][0], heap[0][2]
+
+    def pop(self) -> tuple[float, int]:
+        """
+        Remove and return the queued cell with the lowest priority.
+        Returns:
+            tuple[float, int]: The (priority, cell) pair.
+        Raises:
+            IndexError: If the frontier is empty.
+        """
+        heap = self._heap
+        live = self._live
+        while True:
+            entry = heapq.heappop(heap)
+            cell = entry[2]
+            if live.get(cell) is entry:
+                del live[cell]
+                return entry[0], cell
+            self.stale_skipped += 1
+
+    def remove(self, cell: int) -> bool:
+        """
+        Take a cell off the frontier, if it is queued. Its heap entry becomes stale and is dropped later.
+        Returns:
+            bool: True if the cell was queued.
+        """
+        if self._live.pop(cell, None) is None:
+            return False
+        self._removed += 1
+        return True
+
+    def _compact(self) -> None:
+        """
+        Rebuild the heap from the live entries only.
+        """
+        before = len(self._heap)
+        self._heap = list(self._live.values())
+        heapq.heapify(self._heap)
+        self.stale_purged += before - len(self._heap)
+
+
+class BucketFrontier:
+    """
+    Dial's bucket queue: a circular array of buckets, one per integer priority, for searches whose
+    queued priorities span less than `span` values at any time (e.g. UCS with edge costs up to C:
+    span C + 1). Push and pop are O(1) amortized, plus one step per empty priority skipped, instead of
+    the O(log n) comparisons of a heap.
+
+    Same interface and counters as `HeapFrontier`. Decrease-key leaves the old entry in its bucket,
+    where `pop` drops it. Ties are broken in LIFO order, which makes A* dive along the cells it just
+    reached (the lower h ones).
+    """
+
+    def __init__(self, span: int):
+        """
+        Args:
+            span (int): Number of buckets; every queued priority must be within `span - 1` of the lowest.
+        """
+        self._buckets: list[list[int]] = [[] for _ in range(span)]
+        self._span: int = span
+        self._live: dict[int, int] = {}  # cell -> its current priority
+        self._cursor: int = 0  # no queued priority is lower
+        self._top: int = 0  # no queued priority is higher
+        self.pushes: int = 0
+        self.decreases: int = 0
+        self.stale_skipped: int = 0
+        self.stale_purged: int = 0  # always 0: buckets are never compacted
+        self.peak: int = 0
+        self._removed: int = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __bool__(self) -> bool:
+        return bool(self._live)
+
+    def __contains__(self, cell: int) -> bool:
+        return cell in self._live
+
+    @property
+    def stale_avoided(self) -> int:
+        """
+        Number of outdated entries (one per decrease-key or `remove`) still left in their buckets,
+        i.e. the ones the cursor has not swept past. Buckets are never compacted: every outdated entry
+        the cursor does reach is dropped by `peek`/`pop` and counted in `stale_skipped` instead.
+        """
+        return self.decreases + self._removed - self.stale_skipped
+
+    def priority(self, cell: int) -> int:
+        """
+        Get the current priority of a queued cell.
+        """
+        return self._live[cell]
+
+    def push(self, cell: int, priority: int) -> bool:
+        """
+        Insert a cell, or lower its priority if it is already queued.
+        Args:
+            cell (int): The cell to queue.
+            priority (int): Its priority (lower pops first).
+        Returns:
+            bool: False if the cell was already queued with a priority at least as good, True otherwise.
+        Raises:
+            ValueError: If the queued priorities would then span `span` values or more.
+        """
+        live = self._live.get(cell)
+        if live is not None and priority >= live:
+            return False
+        if not self._live:
+            self._cursor = self._top = priority
+        elif priority - self._span < self._cursor <= self._top < priority + self._span:
+            if priority < self._cursor:
+                self._cursor = priority
+            elif priority > self._top:
+                self._top = priority
+        else:
+            # the bounds may be loose after pops and decrease-keys: tighten them before giving up
+            self._cursor, self._top = min(self._live.values()), max(self._live.values())
+            rest = [p for c, p in self._live.items() if c != cell]
+            low, high = min(rest, default=priority), max(rest, default=priority)
+            if max(high, priority) - min(low, priority) >= self._span:
+                raise ValueError(f"priority {priority} does not fit in a window of {self._span} with {low}..{high}")
+            self._cursor, self._top = min(low, priority), max(high, priority)
+        if live is not None:
+            self.decreases += 1
+        self._live[cell] = priority
+        if len(self._live) > self.peak:
+            self.peak = len(self._live)
+        self._buckets[priority % self._span].append(cell)
+        self.pushes += 1
+        return True
+
+    def _advance(self) -> list[int]:
+        # move the cursor to the lowest priority with a live cell and return its bucket
+        live = self._live
+        if not live:
+            raise IndexError("pop from an empty frontier")
+        while True:
+            bucket = self._buckets[self._cursor % self._span]
+            while bucket:
+                if live.get(bucket[-1]) == self._cursor:
+                    return bucket
+                bucket.pop()
+                self.stale_skipped += 1
+            self._cursor += 1
+
+    def peek(self) -> tuple[int, int]:
+        """
+        Get the queued cell with the lowest priority without removing it.
+        Returns:
+            tuple[int, int]: The (priority, cell) pair.
+        Raises:
+            IndexError: If the frontier is empty.
+        """
+        bucket = self._advance()
+        return self._cursor, bucket[-1]
+
+    def pop(self) -> tuple[int, int]:
+        """
+        Remove and return the queued cell with the lowest priority.
+        Returns:
+            tuple[int, int]: The (priority, cell) pair.
+        Raises:
+            IndexError: If the frontier is empty.
+        """
+        cell = self._advance().pop()
+        del self._live[cell]
+        return self._cursor, cell
+
+    def remove(self, cell: int) -> bool:
+        """
+        Take a cell off the frontier, if it is queued. Its bucket entry becomes stale and is dropped later.
+        Returns:
+            bool: True if the cell was queued.
+        """
+        if self._live.pop(cell, None) is None:
+            return False
+        self._removed += 1
+        return True
@@ -1,5 +1,9 @@
 from utils import *
 from spot import Spot
+from engine import GridMap, MAX_COST, cell_mask, neighbor_masks
+
+# states that are part of the cached static layer; every other state is drawn over it
+STATIC_STATES = (STATE_EMPTY, STATE_BARRIER)
 
 class Grid:
     def __init__(self, win: pygame.Surface, rows: int, cols: int, width: int, height: int):
@@ -18,6 +22,24 @@ class Grid:
         self.width: int = width
         self.height: int = height
         self.grid: list[list[Spot]] = self._make_grid()
+        # state and barrier layers kept in sync with the spots (one byte per cell, row-major),
+        # read by the bulk renderer and handed to the search engine
+        self.states: bytearray = bytearray(rows * cols)
+        self.blocked: bytearray = bytearray(rows * cols)
+        self.costs: bytearray = bytearray([1]) * (rows * cols)  # terrain cost of entering each cell
+        self._masks: bytearray | None = None  # neighbor masks, computed by update_neighbors()
+        # spots whose barrier state changed since the last update_neighbors() call
+        self._edited: set[Spot] = set()
+        # spots whose state changed since the last frame, for draw_dirty()
+        self._dirty: set[Spot] = set()
+        self._full_redraw: bool = True
+        # cached background with the empty cells, barriers and grid lines (see _static_layer)
+        self._static: pygame.Surface | None = None
+        self._static_edits: set[Spot] = set()  # barrier edits not yet applied to the cached layer
+        self._dynamic: set[Spot] = set()  # spots drawn over the static layer (start, end, search states)
+        # bumped on every barrier edit and reset: search results cached for an older version are stale
+        self.version: int = 0
+        self._edit_listeners: list[callable] = []  # called with the flat index of every barrier edit
 
     def _make_grid(self) -> list[list[Spot]]:
         """
@@ -31,37 +53,138 @@ class Grid:
         for i in range(self.rows):
             grid.append([])
             for j in range(self.cols):
-                spot = Spot(i, j, spot_width, spot_height, self.rows)
+                spot = Spot(i, j, spot_width, spot_height, self.rows, owner=self)
                 grid[i].append(spot)
         return grid
 
-    def draw_grid_lines(self) -> None:
+    def draw_grid_lines(self, surface: pygame.Surface | None = None) -> None:
         """
         Draw the grid lines on the Pygame window.
+        Args:
+            surface (pygame.Surface | None): Where to draw them (defaults to the window).
         Returns:
             None
         """
+        surface = surface or self.win
         spot_width = self.width // self.rows  # gap between lines
         spot_height = self.height // self.cols  # gap between lines
         for i in range(self.rows):
             # draw horizontal lines
-            pygame.draw.line(self.win, COLORS['GREY'], (0, i * spot_height), (self.width, i * spot_height))
+            pygame.draw.line(surface, COLORS['GREY'], (0, i * spot_height), (self.width, i * spot_height))
         for j in range(self.cols):
             # draw vertical lines
-            pygame.draw.line(self.win, COLORS['GREY'], (j * spot_width, 0), (j * spot_width, self.height))
+            pygame.draw.line(surface, COLORS['GREY'], (j * spot_width, 0), (j * spot_width, self.height))
+
+    def _draw_spot(self, surface: pygame.Surface, spot: Spot, color: tuple) -> None:
+        """
+        Draw one spot and the grid lines along its edges.
+        """
+        x, y, w, h = spot.x, spot.y, spot.width, spot.height
+        pygame.draw.rect(surface, color, (x, y, w, w))
+        # the spot is a width x width square, which can spill over the next line
+        pygame.draw.line(surface, COLORS['GREY'], (x, y), (x + w, y))
+        pygame.draw.line(surface, COLORS['GREY'], (x, y), (x, y + h))
+        if spot.col + 1 < self.cols:
+            pygame.draw.line(surface, COLORS['GREY'], (x, y + h), (x + w, y + h))
+
+    def _static_layer(self) -> pygame.Surface:
+        """
+        Get the cached background with the empty cells, barriers and grid lines. It is rebuilt when
+        the window size changes; barrier edits are patched into it cell by cell.
+        Returns:
+            pygame.Surface: The static layer, the size of the window.
+        """
+        if self._static is None or self._static.get_size() != self.win.get_size():
+            self._static = pygame.Surface(self.win.get_size())
+            self._static.fill(COLORS['WHITE'])
+            for row in self.grid:
+                for spot in row:
+                    pygame.draw.rect(self._static, self._static_color(spot), (spot.x, spot.y, spot.width, spot.width))
+            self.draw_grid_lines(self._static)
+            self._static_edits.clear()
+        elif self._static_edits:
+            for spot in self._static_edits:
+                self._draw_spot(self._static, spot, self._static_color(spot))
+            self._static_edits.clear()
+        return self._static
+
+    def _static_color(self, spot: Spot) -> tuple:
+        """
+        Get the color of a spot in the static layer: a barrier, or empty ground shaded by its terrain cost.
+        """
+        if spot.state == STATE_BARRIER:
+            return STATE_COLORS[STATE_BARRIER]
+        return terrain_color(self.costs[spot.row * self.cols + spot.col])
 
     def draw(self) -> None:
         """
-        Draw the entire grid and its spots on the Pygame window.
+        Draw the entire grid and its spots on the Pygame window: the cached static layer is blitted,
+        then only the spots with a search, start or end state are drawn over it.
         Returns:
             None
         """
-        self.win.fill(COLORS['WHITE'])  # fill the window with white color
+        self.win.blit(self._static_layer(), (0, 0))
+        for spot in self._dynamic:
+            self._draw_spot(self.win, spot, spot.color)
+        self._dirty.clear()
+        self._full_redraw = False
 
+    def resize(self, win: pygame.Surface, width: int, height: int) -> None:
+        """
+        Move the grid to a new surface and size. The static layer is rebuilt on the next draw.
+        Args:
+            win (pygame.Surface): The Pygame surface (window) where the grid will be drawn.
+            width (int): Width of the window in pixels.
+            height (int): Height of the window in pixels.
+        Returns:
+            None
+        """
+        self.win = win
+        self.width = width
+        self.height = height
+        spot_width = width // self.rows
+        spot_height = height // self.cols
         for row in self.grid:
             for spot in row:
-                spot.draw(self.win)   # draw each spot
-        self.draw_grid_lines()        # draw the grid lines
+                spot.width, spot.height = spot_width, spot_height
+                spot.x, spot.y = spot.row * spot_width, spot.col * spot_height
+        self._static = None
+        self._full_redraw = True
+
+    def invalidate(self) -> None:
+        """
+        Force the next draw_dirty() call to redraw the whole grid (e.g. after something was drawn over it).
+        Returns:
+            None
+        """
+        self._full_redraw = True
+
+    def mark_drawn(self) -> None:
+        """
+        Forget the changes since the last frame, after the whole grid was drawn by other means
+        (e.g. renderer.PaletteRenderer), so they are not kept around for draw_dirty().
+        Returns:
+            None
+        """
+        self._dirty.clear()
+
+    def draw_dirty(self) -> list[pygame.Rect]:
+        """
+        Redraw only the spots whose state changed since the last frame, with the grid lines along
+        their edges. Falls back to a full draw() when invalidated or when most of the grid changed.
+        Returns:
+            list[pygame.Rect]: The redrawn areas in display coordinates, for pygame.display.update().
+        """
+        ox, oy = self.win.get_abs_offset()
+        if self._full_redraw or len(self._dirty) * 4 > self.rows * self.cols:
+            self.draw()
+            return [pygame.Rect(ox, oy, self.width, self.height)]
+        rects = []
+        for spot in self._dirty:
+            self._draw_spot(self.win, spot, self._static_color(spot) if spot.state in STATIC_STATES else spot.color)
+            rects.append(pygame.Rect(ox + spot.x, oy + spot.y, spot.width + 1, max(spot.width, spot.height) + 1))
+        self._dirty.clear()
+        return rects
 
     def get_clicked_pos(self, pos: tuple[int, int]) -> tuple[int, int]:
         """
@@ -77,6 +200,123 @@ class Grid:
         col = x // spot_width
         row = y // spot_height
         return col, row
+
+    def on_spot_changed(self, spot: Spot, old_state: int) -> None:
+        """
+        Called by a spot of this grid after its state changed. Marks it for redraw and records barrier edits
+        for the neighbor masks and the static layer.
+        Args:
+            spot (Spot): The spot that changed.
+            old_state (int): Its previous STATE_* code.
+        Returns:
+            None
+        """
+        self._dirty.add(spot)
+        self.states[spot.row * self.cols + spot.col] = spot.state
+        if spot.state in STATIC_STATES:
+            self._dynamic.discard(spot)
+        else:
+            self._dynamic.add(spot)
+        is_barrier = spot.state == STATE_BARRIER
+        if is_barrier != (old_state == STATE_BARRIER):
+            self.blocked[spot.row * self.cols + spot.col] = is_barrier
+            self._edited.add(spot)
+            self.version += 1
+            for listener in self._edit_listeners:
+                listener(spot.row * self.cols + spot.col)
+            if self._static is not None:
+                self._static_edits.add(spot)
+
+    def add_edit_listener(self, listener: callable) -> None:
+        """
+        Register a callable notified of barrier edits, e.g. an incremental planner.
+        Args:
+            listener (callable): Called as `listener(cell)` with the flat index of every cell that became
+                or stopped being a barrier.
+        Returns:
+            None
+        """
+        self._edit_listeners.append(listener)
+
+    def get_state(self, row: int, col: int) -> int:
+        """
+        Get the STATE_* code of the spot at (row, col).
+        """
+        return self.grid[row][col].state
+
+    def set_state(self, row: int, col: int, state: int) -> None:
+        """
+        Set the STATE_* code of the spot at (row, col).
+        """
+        self.grid[row][col].set_state(state)
+
+    def update_neighbors(self) -> None:
+        """
+        Bring the neighbor masks handed to the search engine up to date (see `to_grid_map`). The first
+        call computes the whole grid; later calls only patch the spots edited since then and their
+        four neighbors, so the cost is O(edits) rather than O(rows * cols).
+        Returns:
+            None
+        """
+        if self._masks is None:
+            self._masks = neighbor_masks(self.rows, self.cols, self.blocked)
+            self._edited.clear()
+            return
+        rows, cols = self.rows, self.cols
+        affected = set()
+        for spot in self._edited:
+            row, col = spot.row, spot.col
+            for r, c in ((row, col), (row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+                if 0 <= r < rows and 0 <= c < cols:
+                    affected.add(r * cols + c)
+        for cell in affected:
+            self._masks[cell] = cell_mask(rows, cols, self.blocked, cell)
+        self._edited.clear()
+
+    def clear_path(self) -> None:
+        """
+        Reset every spot left by a search (open, closed, path) while keeping barriers, start and end.
+        Returns:
+            None
+        """
+        for row in self.grid:
+            for spot in row:
+                if not spot.is_barrier() and not spot.is_start() and not spot.is_end():
+                    spot.reset()
+
+    def set_cost(self, row: int, col: int, cost: int) -> None:
+        """
+        Set the terrain cost of moving into the spot at (row, col).
+        Args:
+            cost (int): 1 for plain ground, up to engine.MAX_COST.
+        Returns:
+            None
+        """
+        if not 1 <= cost <= MAX_COST:
+            raise ValueError(f"terrain cost must be between 1 and {MAX_COST}, got {cost}")
+        cell = row * self.cols + col
+        if self.costs[cell] == cost:
+            return
+        self.costs[cell] = cost
+        self.version += 1  # costs change the search results, but not the neighbor lists
+        spot = self.grid[row][col]
+        self._dirty.add(spot)
+        if self._static is not None:
+            self._static_edits.add(spot)
+
+    def get_cost(self, row: int, col: int) -> int:
+        return self.costs[row * self.cols + col]
+
+    def to_grid_map(self) -> GridMap:
+        """
+        Build the plain, pygame-free description of this grid used by the search engine.
+        Returns:
+            GridMap: The rows, columns, barrier cells, neighbor masks and (if any cell costs more than 1)
+                terrain costs.
+        """
+        self.update_neighbors()
+        costs = bytes(self.costs) if self.costs.count(1) != len(self.costs) else None
+        return GridMap(self.rows, self.cols, bytearray(self.blocked), bytes(self._masks), costs)
     
     def reset(self) -> None:
         """
@@ -86,4 +326,41 @@ class Grid:
         """
         for row in self.grid:
             for spot in row:
-                spot.reset()
\ No newline at end of file
+                spot.reset()  # cleared barriers are recorded as edits
+        if self.costs.count(1) != len(self.costs):
+            self.costs[:] = bytearray([1]) * len(self.costs)
+            self._static = None
+        self.version += 1
+
+    def load_barriers(self, blocked) -> None:
+        """
+        Reset the grid and place the barriers of a layer, e.g. the `blocked` bytes of a loaded map.
+        Args:
+            blocked (bytes-like): One byte per cell in row-major order, non-zero for barriers.
+        Returns:
+            None
+        """
+        self.reset()
+        for cell, value in enumerate(blocked):
+            if value:
+                self.set_state(*divmod(cell, self.cols), STATE_BARRIER)
+
+    def load_costs(self, costs) -> None:
+        """
+        Replace the terrain costs with a layer, e.g. the `costs` bytes of a loaded map.
+        Args:
+            costs (bytes-like): One byte per cell in row-major order, each between 1 and engine.MAX_COST.
+        Returns:
+            None
+        Raises:
+            ValueError: If the layer has the wrong size or a cost is out of range.
+        """
+        costs = bytes(costs)
+        if len(costs) != len(self.costs):
+            raise ValueError(f"expected {len(self.costs)} terrain costs, got {len(costs)}")
+        if costs and not 1 <= min(costs) <= max(costs) <= MAX_COST:
+            raise ValueError(f"terrain costs must be between 1 and {MAX_COST}")
+        self.costs[:] = costs
+        self._static = None
+        self._full_redraw = True
+        self.version += 1  # costs change the search results, but not the neighbor lists
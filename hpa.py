@@ -0,0 +1,370 @@
+"""
+Hierarchical path-finding (HPA*) for very large maps.
+
+The grid is split into square clusters. Along every border between two clusters, each run of cells
+that is free on both sides becomes an entrance with one or two transitions (pairs of facing cells);
+the transition cells are the nodes of an abstract graph. Inside a cluster the nodes are connected by
+their in-cluster distances, computed the first time a search reaches the cluster and cached.
+
+A query connects start and goal to the nodes of their clusters, runs A* on the abstract graph and
+then refines only the abstract edges on the resulting path into cell paths. Paths are close to
+optimal, not guaranteed optimal. After barrier edits only the touched clusters (and the neighbors
+they share a changed border with) are rebuilt.
+"""
+import heapq
+import math
+
+from engine import GridMap, SearchResult, EVENT_STEP, EVENT_OPEN, EVENT_CLOSE, _endpoints, _found
+
+ENTRANCE_SPLIT = 6  # entrances at least this wide get a transition at each end instead of one in the middle
+
+
+class HPAPlanner:
+    """
+    Cluster abstraction of a grid, answering queries with HPA*.
+    """
+
+    def __init__(self, gmap: GridMap, cluster_size: int = 32):
+        """
+        Build the entrances of every cluster border. The in-cluster distances are computed lazily.
+        Args:
+            gmap (GridMap): The grid. Its barrier layer is copied; report later edits to `update_cells`.
+            cluster_size (int): Side of the square clusters, in cells.
+        """
+        self.gmap: GridMap = GridMap(gmap.rows, gmap.cols, bytearray(gmap.blocked))
+        self.cluster_size: int = cluster_size
+        self.cluster_rows: int = -(-gmap.rows // cluster_size)
+        self.cluster_cols: int = -(-gmap.cols // cluster_size)
+        # (cluster, neighbor cluster) with cluster < neighbor -> transitions (cell in cluster, cell in neighbor)
+        self._borders: dict[tuple[int, int], list[tuple[int, int]]] = {}
+        self._inter: dict[int, set[int]] = {}  # node -> nodes across a border (edge cost 1)
+        # cluster -> node -> [(node, in-cluster distance)], filled on demand
+        self._intra: dict[int, dict[int, list[tuple[int, int]]]] = {}
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            crow, ccol = divmod(cluster, self.cluster_cols)
+            if crow + 1 < self.cluster_rows:
+                self._build_border(cluster, cluster + self.cluster_cols)
+            if ccol + 1 < self.cluster_cols:
+                self._build_border(cluster, cluster + 1)
+
+    # ---- abstraction ----
+    def cluster_of(self, cell: int) -> int:
+        row, col = divmod(cell, self.gmap.cols)
+        return (row // self.cluster_size) * self.cluster_cols + col // self.cluster_size
+
+    def _bounds(self, cluster: int) -> tuple[int, int, int, int]:
+        """
+        Get the first row, first column, end row and end column (exclusive) of a cluster.
+        """
+        crow, ccol = divmod(cluster, self.cluster_cols)
+        size = self.cluster_size
+        return (crow * size, ccol * size,
+                min((crow + 1) * size, self.gmap.rows), min((ccol + 1) * size, self.gmap.cols))
+
+    def _build_border(self, a: int, b: int) -> bool:
+        """
+        (Re)compute the transitions between cluster `a` and the cluster `b` below or right of it.
+        Returns:
+            bool: True if they changed.
+        """
+        cols, blocked = self.gmap.cols, self.gmap.blocked
+        r0, c0, r1, c1 = self._bounds(a)
+        if b == a + 1 and b % self.cluster_cols:  # vertical border: column c1 - 1 of a faces column c1 of b
+            pairs = [(r * cols + c1 - 1, r * cols + c1) for r in range(r0, r1)]
+        else:  # horizontal border: row r1 - 1 of a faces row r1 of b
+            pairs = [((r1 - 1) * cols + c, r1 * cols + c) for c in range(c0, c1)]
+        transitions = []
+        run: list[tuple[int, int]] = []
+        for pair in pairs + [None]:
+            if pair is not None and not blocked[pair[0]] and not blocked[pair[1]]:
+                run.append(pair)
+                continue
+            if run:
+                if len(run) < ENTRANCE_SPLIT:
+                    transitions.append(run[len(run) // 2])
+                else:
+                    transitions.extend((run[0], run[-1]))
+                run = []
+        old = self._borders.get((a, b), [])
+        if transitions == old:
+            return False
+        for x, y in old:
+            self._inter[x].discard(y)
+            self._inter[y].discard(x)
+        for x, y in transitions:
+            self._inter.setdefault(x, set()).add(y)
+            self._inter.setdefault(y, set()).add(x)
+        self._borders[(a, b)] = transitions
+        return True
+
+    def _adjacent_clusters(self, cluster: int) -> list[int]:
+        crow, ccol = divmod(cluster, self.cluster_cols)
+        out = []
+        if crow > 0:
+            out.append(cluster - self.cluster_cols)
+        if crow + 1 < self.cluster_rows:
+            out.append(cluster + self.cluster_cols)
+        if ccol > 0:
+            out.append(cluster - 1)
+        if ccol + 1 < self.cluster_cols:
+            out.append(cluster + 1)
+        return out
+
+    def _nodes(self, cluster: int) -> list[int]:
+        """
+        Get the abstract nodes (transition cells) inside a cluster.
+        """
+        nodes = set()
+        for other in self._adjacent_clusters(cluster):
+            if cluster < other:
+                nodes.update(x for x, _ in self._borders.get((cluster, other), ()))
+            else:
+                nodes.update(y for _, y in self._borders.get((other, cluster), ()))
+        return sorted(nodes)
+
+    def _local_graph(self, cluster: int) -> list[list[int]]:
+        """
+        Get the adjacency lists of the free cells of a cluster, indexed by their position inside the
+        cluster (`(row - r0) * width + (col - c0)`); edges leaving the cluster are left out.
+        """
+        r0, c0, r1, c1 = self._bounds(cluster)
+        cols, blocked = self.gmap.cols, self.gmap.blocked
+        width, height = c1 - c0, r1 - r0
+        adj: list[list[int]] = [[] for _ in range(width * height)]
+        for local_row in range(height):
+            base = (r0 + local_row) * cols + c0
+            for local_col in range(width):
+                if blocked[base + local_col]:
+                    continue
+                i = local_row * width + local_col
+                if local_col + 1 < width and not blocked[base + local_col + 1]:
+                    adj[i].append(i + 1)
+                    adj[i + 1].append(i)
+                if local_row + 1 < height and not blocked[base + cols + local_col]:
+                    adj[i].append(i + width)
+                    adj[i + width].append(i)
+        return adj
+
+    def _cluster_distances(self, source: int, cluster: int, targets, adj: list[list[int]] | None = None) -> dict[int, int]:
+        """
+        BFS from `source` without leaving `cluster`, until every cell of `targets` is reached.
+        Args:
+            adj (list[list[int]] | None): The cluster's `_local_graph`, if already built.
+        Returns:
+            dict[int, int]: The in-cluster distance of each reachable target.
+        """
+        r0, c0, r1, c1 = self._bounds(cluster)
+        cols, blocked = self.gmap.cols, self.gmap.blocked
+        width = c1 - c0
+        remaining = set(targets)
+        found = {}
+        if source in remaining:
+            found[source] = 0
+            remaining.discard(source)
+        if not remaining:
+            return found
+        if all(blocked.count(0, r * cols + c0, r * cols + c1) == width for r in range(r0, r1)):
+            # an open rectangle: the distances are Manhattan distances
+            sr, sc = divmod(source, cols)
+            for cell in remaining:
+                tr, tc = divmod(cell, cols)
+                found[cell] = abs(sr - tr) + abs(sc - tc)
+            return found
+        if adj is None:
+            adj = self._local_graph(cluster)
+
+        def local(cell: int) -> int:
+            row, col = divmod(cell, cols)
+            return (row - r0) * width + col - c0
+
+        wanted = {local(cell): cell for cell in remaining}
+        dist = [-1] * len(adj)
+        source_local = local(source)
+        dist[source_local] = 0
+        frontier = [source_local]
+        d = 0
+        while frontier and wanted:
+            d += 1
+            layer = []
+            for i in frontier:
+                for j in adj[i]:
+                    if dist[j] < 0:
+                        dist[j] = d
+                        layer.append(j)
+                        if j in wanted:
+                            found[wanted.pop(j)] = d
+            frontier = layer
+        return found
+
+    def _intra_edges(self, cluster: int) -> dict[int, list[tuple[int, int]]]:
+        edges = self._intra.get(cluster)
+        if edges is None:
+            nodes = self._nodes(cluster)
+            edges = {node: [] for node in nodes}
+            adj = None
+            if len(nodes) > 1:
+                adj = self._local_graph(cluster)
+            for i, node in enumerate(nodes):
+                for other, d in self._cluster_distances(node, cluster, nodes[i + 1:], adj).items():
+                    edges[node].append((other, d))
+                    edges[other].append((node, d))
+            self._intra[cluster] = edges
+        return edges
+
+    def prepare(self) -> None:
+        """
+        Compute the in-cluster edges of every cluster now instead of on first use, so that later
+        queries have a predictable latency.
+        Returns:
+            None
+        """
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            self._intra_edges(cluster)
+
+    def update_cells(self, cells, blocked: bytearray) -> None:
+        """
+        Apply barrier edits: only the clusters containing the cells are rebuilt, plus the neighbors
+        whose shared border changed.
+        Args:
+            cells (Iterable[int]): Flat indices of the cells whose barrier state may have changed.
+            blocked (bytearray): The current barrier layer of the grid (one byte per cell).
+        Returns:
+            None
+        """
+        own = self.gmap.blocked
+        touched = set()
+        for cell in cells:
+            is_blocked = 1 if blocked[cell] else 0
+            if own[cell] != is_blocked:
+                own[cell] = is_blocked
+                touched.add(self.cluster_of(cell))
+        for cluster in touched:
+            self._intra.pop(cluster, None)
+            for other in self._adjacent_clusters(cluster):
+                a, b = min(cluster, other), max(cluster, other)
+                if self._build_border(a, b):
+                    self._intra.pop(other, None)
+
+    # ---- queries ----
+    def search(self, start: tuple[int, int], goal: tuple[int, int], observer=None) -> SearchResult:
+        """
+        Find a path with HPA*. The observer sees the abstract search (nodes opened and closed) and
+        the refined path.
+        Args:
+            start (tuple[int, int]): The (row, col) start position.
+            goal (tuple[int, int]): The (row, col) goal position.
+            observer (callable | None): Called as `observer(event, cell)`, as with the engine searches.
+        Returns:
+            SearchResult: The refined cell path; `expanded` counts abstract nodes and refinement cells.
+        """
+        gmap = self.gmap
+        s, t = _endpoints(gmap, start, goal)
+        if gmap.blocked[s] or gmap.blocked[t]:
+            return SearchResult(False)
+        cs, ct = self.cluster_of(s), self.cluster_of(t)
+        # temporary edges of start and goal to the nodes of their clusters (and to each other)
+        extra: dict[int, list[tuple[int, int]]] = {s: [], t: []}
+        for d_node, d in self._cluster_distances(s, cs, self._nodes(cs) + ([t] if cs == ct else [])).items():
+            extra[s].append((d_node, d))
+            extra.setdefault(d_node, []).append((s, d))
+        for d_node, d in self._cluster_distances(t, ct, self._nodes(ct)).items():
+            extra[t].append((d_node, d))
+            extra.setdefault(d_node, []).append((t, d))
+
+        cols = gmap.cols
+        tr, tc = divmod(t, cols)
+
+        def h(cell: int) -> int:
+            row, col = divmod(cell, cols)
+            return abs(row - tr) + abs(col - tc)
+
+        heap = [(h(s), h(s), s)]
+        g_score = {s: 0}
+        previous: dict[int, int | None] = {s: None}
+        closed = set()
+        expanded = generated = stale = 0
+        peak = 1
+        while heap:
+            _, _, node = heapq.heappop(heap)
+            if node in closed:
+                stale += 1
+                continue
+            if observer is not None:
+                observer(EVENT_STEP, node)
+            if node == t:
+                break
+            closed.add(node)
+            expanded += 1
+            edges = list(self._intra_edges(self.cluster_of(node)).get(node, ()))
+            edges.extend((other, 1) for other in self._inter.get(node, ()))
+            edges.extend(extra.get(node, ()))
+            for other, cost in edges:
+                tentative = g_score[node] + cost
+                if other not in closed and tentative < g_score.get(other, math.inf):
+                    g_score[other] = tentative
+                    previous[other] = node
+                    heapq.heappush(heap, (tentative + h(other), h(other), other))
+                    generated += 1
+                    if len(heap) > peak:
+                        peak = len(heap)
+                    if observer is not None:
+                        observer(EVENT_OPEN, other)
+            if observer is not None:
+                observer(EVENT_CLOSE, node)
+        else:
+            return SearchResult(False, expanded=expanded, generated=generated, peak_frontier=peak, stale_skipped=stale)
+
+        abstract = []
+        node = t
+        while node is not None:
+            abstract.append(node)
+            node = previous[node]
+        abstract.reverse()
+        cells = [s]
+        for a, b in zip(abstract, abstract[1:]):
+            segment, refined = self._refine(a, b)
+            cells.extend(segment[1:])
+            expanded += refined
+        return _found(gmap, cells, observer, expanded, generated, peak_frontier=peak, stale_skipped=stale)
+
+    def _refine(self, a: int, b: int) -> tuple[list[int], int]:
+        """
+        Turn one abstract edge into cells: adjacent cells across a border, or an A* restricted to the
+        cluster the two nodes share.
+        Returns:
+            tuple[list[int], int]: The cells from `a` to `b` inclusive, and the number of cells expanded.
+        """
+        if self.cluster_of(a) != self.cluster_of(b):
+            return [a, b], 0
+        r0, c0, r1, c1 = self._bounds(self.cluster_of(a))
+        cols, blocked = self.gmap.cols, self.gmap.blocked
+        br, bc = divmod(b, cols)
+
+        def h(cell: int) -> int:
+            row, col = divmod(cell, cols)
+            return abs(row - br) + abs(col - bc)
+
+        heap = [(h(a), h(a), a)]
+        g_score = {a: 0}
+        previous: dict[int, int | None] = {a: None}
+        expanded = 0
+        while heap:
+            _, _, cell = heapq.heappop(heap)
+            if cell == b:
+                break
+            expanded += 1
+            row, col = divmod(cell, cols)
+            for n_row, n_col in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+                if r0 <= n_row < r1 and c0 <= n_col < c1:
+                    neighbor = n_row * cols + n_col
+                    if not blocked[neighbor] and g_score[cell] + 1 < g_score.get(neighbor, math.inf):
+                        g_score[neighbor] = g_score[cell] + 1
+                        previous[neighbor] = cell
+                        heapq.heappush(heap, (g_score[neighbor] + h(neighbor), h(neighbor), neighbor))
+        path = []
+        cell = b
+        while cell is not None:
+            path.append(cell)
+            cell = previous[cell]
+        path.reverse()
+        return path, expanded
@@ -0,0 +1,134 @@
+"""
+Incremental replanning with Lifelong Planning A* (LPA*).
+
+An `LPAStar` planner is bound to one start and goal and keeps its g/rhs values between searches.
+After barrier edits only the changed cells are passed to `update_cells`, and the next `search`
+repairs the previous solution instead of starting from scratch: its cost depends on how much of the
+old search the edits invalidate, not on the size of the map.
+"""
+import math
+
+from engine import GridMap, SearchResult, EVENT_STEP, EVENT_OPEN, EVENT_CLOSE, h_manhattan, _endpoints, _found
+from frontier import HeapFrontier
+
+
+class LPAStar:
+    """
+    Lifelong Planning A* on a 4-connected grid with unit edge costs.
+
+    Every cell has a g value (its distance as of the last expansion) and an rhs value (the one-step
+    lookahead min(g(n) + 1) over its free neighbors). A cell is locally inconsistent when the two
+    differ; only those cells are queued, ordered by the key (min(g, rhs) + h, min(g, rhs)).
+    """
+
+    def __init__(self, gmap: GridMap, start: tuple[int, int], goal: tuple[int, int]):
+        """
+        Initialize a planner. The barrier layer of `gmap` is copied; later changes must be reported
+        through `update_cells`.
+        Args:
+            gmap (GridMap): The grid to plan on.
+            start (tuple[int, int]): The (row, col) start position.
+            goal (tuple[int, int]): The (row, col) goal position.
+        """
+        self.gmap: GridMap = GridMap(gmap.rows, gmap.cols, bytearray(gmap.blocked))
+        self.start: tuple[int, int] = start
+        self.goal: tuple[int, int] = goal
+        self._s, self._t = _endpoints(self.gmap, start, goal)
+        self._g: dict[int, float] = {}    # missing cells are at infinity
+        self._rhs: dict[int, float] = {self._s: 0.0}
+        self._open = HeapFrontier()
+        self._open.push(self._s, self._key(self._s))
+        self.expanded: int = 0  # cells expanded by the last search
+
+    def _key(self, cell: int) -> tuple[float, float]:
+        best = min(self._g.get(cell, math.inf), self._rhs.get(cell, math.inf))
+        return best + h_manhattan(self.gmap, cell, self._t), best
+
+    def _update_vertex(self, cell: int, observer=None) -> None:
+        """
+        Recompute the rhs value of a cell and (re)queue it if it became inconsistent.
+        """
+        if cell != self._s:
+            rhs = math.inf
+            if not self.gmap.blocked[cell]:
+                g = self._g
+                for neighbor in self.gmap.neighbors(cell):
+                    rhs = min(rhs, g.get(neighbor, math.inf) + 1)
+            if rhs == math.inf:
+                self._rhs.pop(cell, None)
+            else:
+                self._rhs[cell] = rhs
+        self._open.remove(cell)
+        if self._g.get(cell, math.inf) != self._rhs.get(cell, math.inf):
+            self._open.push(cell, self._key(cell))
+            if observer is not None and not self.gmap.blocked[cell]:
+                observer(EVENT_OPEN, cell)
+
+    def update_cells(self, cells, blocked: bytearray) -> None:
+        """
+        Apply barrier edits. Only the listed cells are read from `blocked`.
+        Args:
+            cells (Iterable[int]): Flat indices of the cells whose barrier state may have changed.
+            blocked (bytearray): The current barrier layer of the grid (one byte per cell).
+        Returns:
+            None
+        """
+        own = self.gmap.blocked
+        cols, rows = self.gmap.cols, self.gmap.rows
+        for cell in cells:
+            is_blocked = 1 if blocked[cell] else 0
+            if own[cell] == is_blocked:
+                continue
+            own[cell] = is_blocked
+            self._update_vertex(cell)
+            row, col = divmod(cell, cols)
+            # the neighbors are updated whether or not they are free: the edge to `cell` changed
+            for n_row, n_col in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+                if 0 <= n_row < rows and 0 <= n_col < cols:
+                    self._update_vertex(n_row * cols + n_col)
+
+    def search(self, observer=None) -> SearchResult:
+        """
+        Bring the g values up to date and extract a shortest path.
+        Args:
+            observer (callable | None): Called as `observer(event, cell)`, as with the engine searches.
+                Never called for barrier cells.
+        Returns:
+            SearchResult: The path from start to goal; `expanded` counts only this call's expansions.
+        """
+        g, rhs, open_set, t = self._g, self._rhs, self._open, self._t
+        expanded = 0
+        stale_before = open_set.stale_skipped
+        while open_set and (open_set.peek()[0] < self._key(t) or
+                            g.get(t, math.inf) != rhs.get(t, math.inf)):
+            _, current = open_set.pop()
+            # a cell that just became a barrier is still queued once to invalidate its old distance;
+            # it is not reported to the observer, which would repaint it over the barrier
+            visible = observer is not None and not self.gmap.blocked[current]
+            if visible:
+                observer(EVENT_STEP, current)
+            expanded += 1
+            if g.get(current, math.inf) > rhs.get(current, math.inf):
+                g[current] = rhs[current]  # overconsistent: settle it
+            else:
+                g.pop(current, None)  # underconsistent: its old distance is no longer valid
+                self._update_vertex(current, observer)
+            for neighbor in self.gmap.neighbors(current):
+                self._update_vertex(neighbor, observer)
+            if visible:
+                observer(EVENT_CLOSE, current)
+        self.expanded = expanded
+        stale_skipped = open_set.stale_skipped - stale_before
+
+        if g.get(t, math.inf) == math.inf:
+            return SearchResult(False, expanded=expanded, generated=open_set.pushes, peak_frontier=open_set.peak,
+                                stale_skipped=stale_skipped)
+        # walk back from the goal, always to a neighbor one step closer to the start
+        cells = [t]
+        current = t
+        while current != self._s:
+            current = min(self.gmap.neighbors(current), key=lambda n: g.get(n, math.inf))
+            cells.append(current)
+        cells.reverse()
+        return _found(self.gmap, cells, observer, expanded, open_set.pushes, peak_frontier=open_set.peak,
+                      stale_skipped=stale_skipped)
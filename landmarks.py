@@ -0,0 +1,107 @@
+"""
+ALT heuristic: A*, Landmarks and the Triangle inequality.
+
+A few landmark cells are picked and the exact distance from each of them to every cell is stored
+(one `engine.distance_field` per landmark). For any cell v, goal t and landmark L the triangle
+inequality gives d(v, t) >= |d(L, t) - d(L, v)|, and the maximum over the landmarks is an admissible
+and consistent heuristic that, unlike Manhattan distance, sees the walls of maze-like maps.
+"""
+import math
+
+from engine import GridMap, UNREACHABLE, distance_field, h_manhattan
+
+try:
+    import numpy as np
+except ImportError:  # optional: only speeds up the landmark selection
+    np = None
+
+
+class Landmarks:
+    """
+    Distance tables to K landmarks, valid for the barrier layout they were computed on.
+    """
+
+    def __init__(self, gmap: GridMap, k: int = 8):
+        """
+        Pick `k` landmarks by farthest-point selection (each new landmark is the reachable cell farthest
+        from the ones already chosen) and compute their distance tables.
+        Args:
+            gmap (GridMap): The grid. Its barrier layer is copied to check later reuse (see `matches`).
+            k (int): Number of landmarks; fewer are used if the grid has fewer free cells.
+        """
+        self.rows: int = gmap.rows
+        self.cols: int = gmap.cols
+        self.blocked: bytes = bytes(gmap.blocked)
+        self.landmarks: list[tuple[int, int]] = []
+        self.tables: list = []  # one array('i') of distances per landmark, UNREACHABLE if cut off
+        first = self.blocked.find(0)
+        if first == -1:
+            return
+        # distance to the nearest chosen landmark, UNREACHABLE for cells none of them can reach
+        nearest = distance_field(gmap, gmap.position(first))
+        for _ in range(k):
+            far = self._farthest(nearest)
+            if far is None:
+                break
+            table = distance_field(gmap, gmap.position(far))
+            self.landmarks.append(gmap.position(far))
+            self.tables.append(table)
+            self._merge(nearest, table)
+
+    def _farthest(self, nearest) -> int | None:
+        """
+        Get the next landmark: the cell farthest from the chosen ones or, once every reachable cell is
+        a landmark, a free cell of another component (None if there is none).
+        """
+        if np is not None:
+            near = np.frombuffer(nearest, dtype=np.int32)
+            far = int(near.argmax())
+            if not self.landmarks or near[far] > 0:
+                return far
+            other = np.flatnonzero((near == UNREACHABLE) & (np.frombuffer(self.blocked, dtype=np.uint8) == 0))
+            return int(other[0]) if other.size else None
+        far = max(range(len(nearest)), key=nearest.__getitem__)
+        if not self.landmarks or nearest[far] > 0:
+            return far
+        return next((c for c, d in enumerate(nearest) if d == UNREACHABLE and not self.blocked[c]), None)
+
+    @staticmethod
+    def _merge(nearest, table) -> None:
+        """
+        Lower `nearest` to the distances of a new landmark's table, in place.
+        """
+        if np is not None:
+            near = np.frombuffer(nearest, dtype=np.int32)
+            dist = np.frombuffer(table, dtype=np.int32)
+            closer = (dist != UNREACHABLE) & ((near == UNREACHABLE) | (dist < near))
+            near[closer] = dist[closer]
+            return
+        for cell, d in enumerate(table):
+            if d != UNREACHABLE and (nearest[cell] == UNREACHABLE or d < nearest[cell]):
+                nearest[cell] = d
+
+    def matches(self, gmap: GridMap) -> bool:
+        """
+        Check whether the tables are still valid for a grid, i.e. it has the same barriers.
+        """
+        return (gmap.rows, gmap.cols) == (self.rows, self.cols) and bytes(gmap.blocked) == self.blocked
+
+    def heuristic(self, gmap: GridMap, cell: int, goal: int) -> float:
+        """
+        ALT lower bound on the distance from `cell` to `goal`, never below the Manhattan distance.
+        Has the `heuristic(gmap, cell, goal)` signature of `engine.astar` and `engine.ida_star`.
+        Returns:
+            float: The bound, or infinity when a landmark shows the two cells are not connected.
+        """
+        best = h_manhattan(gmap, cell, goal)
+        for table in self.tables:
+            a, b = table[cell], table[goal]
+            if a == UNREACHABLE or b == UNREACHABLE:
+                if a != b:
+                    return math.inf  # one of them is in the landmark's component, the other is not
+                continue
+            if a - b > best:
+                best = a - b
+            elif b - a > best:
+                best = b - a
+        return float(best)
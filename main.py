@@ -1,5 +1,15 @@
 from utils import *
+import sys
+import time
+from dataclasses import replace
 from grid import Grid
+from array_grid import ArrayGrid
+from renderer import PaletteRenderer, HeatmapRenderer
+from engine import HEURISTICS, distance_field
+from scheduler import FrameScheduler
+from worker import SearchWorker
+from cache import PathCache
+from mapio import load_map, save_map
 from searching_algorithms import *
 
 
@@ -30,8 +40,13 @@ if __name__ == "__main__":
     # set a caption for the window
     pygame.display.set_caption("Path Visualizing Algorithm")
 
-    ROWS = 50  # number of rows
-    COLS = 50  # number of columns
+    # a map file given on the command line (a binary map saved with S, or a MovingAI .map file) sets the
+    # size, barriers and endpoints of the grid; see mapio
+    MAP_PATH = sys.argv[1] if len(sys.argv) > 1 else None
+    SAVE_PATH = "grid.gmap"
+    loaded = load_map(MAP_PATH) if MAP_PATH else None
+    ROWS = loaded.gmap.rows if loaded else 50  # number of rows
+    COLS = loaded.gmap.cols if loaded else 50  # number of columns
 
     # --- UI: dropdown selector for algorithms ---
     FONT = pygame.font.SysFont(None, 20)
@@ -39,15 +54,27 @@ if __name__ == "__main__":
     margin = 8
     start_x, start_y = margin, margin
 
+    lpa_star = IncrementalPlanner()  # keeps its search between runs, repaired after barrier edits
+    hpa_star = HierarchicalPlanner(cluster_size=10)  # clusters of 10x10 cells, rebuilt only where edited
+    # press E to cycle the heuristic of A*, Greedy and IDA* through HEURISTICS
+    heuristic = {'name': HEURISTICS[0]}
+    HEURISTIC_ALGOS = ("A*", "Greedy", "IDA*")
     algos = [
         ("BFS", bfs),
         ("DFS", dfs),
-        ("A*", astar),
+        ("A*", lambda draw, g, s, e: astar(draw, g, s, e, heuristic=heuristic['name'])),
+        ("A* (ALT)", astar_alt),
         ("UCS", ucs),
-        ("Greedy", greedy_search),
+        ("Greedy", lambda draw, g, s, e: greedy_search(draw, g, s, e, heuristic=heuristic['name'])),
         ("DLS", lambda draw, g, s, e: dls(draw, g, s, e, limit=110)),
         ("IDS", lambda draw, g, s, e: ids(draw, g, s, e, max_depth=50)),
-        ("IDA*", ida_star),
+        ("IDA*", lambda draw, g, s, e: ida_star(draw, g, s, e, heuristic=heuristic['name'])),
+        ("IDA* (ALT)", ida_star_alt),
+        ("JPS", jps),
+        ("Bi-BFS", bidirectional_bfs),
+        ("Bi-A*", bidirectional_astar),
+        ("LPA*", lpa_star),
+        ("HPA*", hpa_star),
     ]
 
     dropdown_w = 160
@@ -95,6 +122,11 @@ if __name__ == "__main__":
         def toggle(self):
             self.expanded = not self.expanded
 
+        def menu_rect(self):
+            # area covered by the box and, when expanded, the option list
+            n = len(self.options) + 1 if self.expanded else 1
+            return pygame.Rect(self.rect.x, self.rect.y, self.rect.w + 1, self.rect.h * n + 1)
+
     dropdown = Dropdown(start_x, start_y, dropdown_w, btn_h, algos, FONT)
     # Run and Clear buttons (to right of dropdown)
     run_btn = Button(dropdown.rect.right + margin, start_y, 100, btn_h, "Run", FONT, color=(150,200,150))
@@ -104,39 +136,247 @@ if __name__ == "__main__":
     # reserve UI bar height and create a subsurface for the grid below the UI
     ui_bar_h = btn_h + margin * 2
     grid_surface = WIN.subsurface((0, ui_bar_h, WIDTH, HEIGHT - ui_bar_h))
-    grid = Grid(grid_surface, ROWS, COLS, WIDTH, HEIGHT - ui_bar_h)
-
-    start = None
-    end = None
-
-    
-    # flags for running the main loop
-    run = True
-    started = False
-    painting = False
-    # throttle drawing during algorithms: draw only every N calls
-    DRAW_THROTTLE = 3
-    draw_state = { 'count': 0 }
-
-    while run:
-        grid.draw()  # draw the grid and its spots
+    # on large maps, or maps with more rows or columns than pixels, cells are a few pixels or less:
+    # draw the whole state matrix through a palette instead of cell by cell
+    BULK_RENDERING = ROWS * COLS > 250_000 or ROWS > WIDTH or COLS > HEIGHT - ui_bar_h
+    # large maps use the array-backed grid: one bytearray of states instead of ROWS*COLS Spot objects.
+    # So do loaded maps, which need not be square: Grid sizes its spots for a square grid, while
+    # ArrayGrid maps clicks to cells proportionally on both axes
+    GridBackend = ArrayGrid if BULK_RENDERING or loaded is not None or ROWS != COLS else Grid
+    grid = GridBackend(grid_surface, ROWS, COLS, WIDTH, HEIGHT - ui_bar_h)
+    if loaded is not None:
+        grid.load_barriers(loaded.gmap.blocked)
+        if loaded.gmap.costs is not None:
+            grid.load_costs(loaded.gmap.costs)
+    grid.add_edit_listener(lpa_star.on_edit)
+    grid.add_edit_listener(hpa_star.on_edit)
+
+    # start and end are (row, col) positions
+    start = loaded.start if loaded else None
+    end = loaded.end if loaded else None
+    if start:
+        grid.set_state(*start, STATE_START)
+    if end:
+        grid.set_state(*end, STATE_END)
+
+    # redraw only the cells that changed since the last frame and update just those rects;
+    # set to False to redraw and flip the whole window every frame
+    DIRTY_RENDERING = True
+    bulk_renderer = PaletteRenderer(grid) if BULK_RENDERING else None
+    ui_state = { 'expanded': False }
+    # press H to show the distance from the end cell to every cell as a heat map (see engine.distance_field);
+    # the field is recomputed when barriers are edited or the end moves
+    heatmap_renderer = HeatmapRenderer(grid)
+    heatmap = {'shown': False, 'key': None, 'field': None}
+    # left click and drag paint barriers; press 1-9 to paint terrain of that cost instead (1 is plain
+    # ground, only UCS and A* take the cost into account) and 0 to go back to barriers
+    brush = {'cost': None}
+    # counters of the running or last search (a SearchStats), shown right of the buttons
+    STATS_FONT = pygame.font.SysFont(None, 17)
+    # in background mode `drawn` adds up the time this thread spends replaying and rendering the search
+    stats = {'name': None, 'result': None, 'cached': False, 'began': 0.0, 'drawn': 0.0}
+
+    def heatmap_field():
+        key = (grid.version, end)
+        if heatmap['key'] != key:
+            heatmap['key'] = key
+            heatmap['field'] = distance_field(grid.to_grid_map(), end)
+        return heatmap['field']
+
+    def paint(row: int, col: int) -> None:
+        """
+        Paint a cell with the current brush: a barrier, or a terrain cost on a cell that is not a barrier.
+        """
+        if brush['cost'] is None:
+            grid.set_state(row, col, STATE_BARRIER)
+        elif grid.get_state(row, col) != STATE_BARRIER:
+            grid.set_cost(row, col, brush['cost'])
+
+    def stats_lines() -> list[str]:
+        """
+        Get the text of the stats overlay: live progress while a search runs, its counters after.
+        """
+        if stats['name'] is None:
+            return []
+        if started:
+            return [f"{stats['name']}: running {time.perf_counter() - stats['began']:.2f} s",
+                    f"{grid.states.count(STATE_CLOSED)} closed, {grid.states.count(STATE_OPEN)} open"]
+        result = stats['result']
+        if result is None:
+            return [f"{stats['name']}: no result"]
+        found = "no path"
+        if result.found:
+            found = f"path {result.path_length}"
+            if result.path_cost != result.path_length:
+                found += f" (cost {result.path_cost:g})"
+        return [f"{stats['name']}{' (cached)' if stats['cached'] else ''}: {found}, {result.expanded} expanded",
+                f"{result.pushes} pushes, {result.stale_skipped} stale, peak open {result.peak_open}",
+                f"search {result.search_seconds * 1000:.1f} ms, draw {result.draw_seconds * 1000:.1f} ms"]
+
+    def render(bar_color=(120, 120, 120)):
+        """
+        Draw the grid and the UI bar on top of it, then update the display.
+        """
+        if dropdown.expanded != ui_state['expanded']:
+            # the option list is drawn over the grid: repaint the grid under it when it closes
+            ui_state['expanded'] = dropdown.expanded
+            grid.invalidate()
+        rects = None
+        if heatmap['shown'] and end:
+            rects = heatmap_renderer.draw_field(heatmap_field())
+        elif bulk_renderer is not None:
+            rects = bulk_renderer.draw()
+        elif DIRTY_RENDERING:
+            rects = grid.draw_dirty()
+        else:
+            grid.draw()  # draw the grid and its spots
         # draw UI background bar so buttons are always visible
-        ui_bar_h = btn_h + margin * 2
-        pygame.draw.rect(WIN, (120, 120, 120), (0, 0, WIDTH, ui_bar_h))
+        pygame.draw.rect(WIN, bar_color, (0, 0, WIDTH, ui_bar_h))
         # draw dropdown and UI buttons on top
         dropdown.draw(WIN)
         run_btn.draw(WIN)
         clear_btn.draw(WIN)
         clear_all_btn.draw(WIN)
+        line_h = STATS_FONT.get_linesize()
+        for i, line in enumerate(stats_lines()):
+            WIN.blit(STATS_FONT.render(line, True, (0, 0, 0)), (clear_all_btn.rect.right + margin, 2 + i * line_h))
         # flip the display after drawing grid + UI so dropdown/overlays show correctly
-        pygame.display.update()
+        if rects is not None:
+            rects.append(pygame.Rect(0, 0, WIDTH, ui_bar_h))
+            if dropdown.expanded:
+                rects.append(dropdown.menu_rect())
+            pygame.display.update(rects)
+        else:
+            pygame.display.update()
+
+    # flags for running the main loop
+    run = True
+    started = False
+    painting = False
+    # during a search, redraw at TARGET_FPS and pump events EVENT_PUMP_HZ times per second,
+    # independently of how fast the algorithm runs. Press U to toggle the unthrottled mode,
+    # which skips rendering until the search is done.
+    TARGET_FPS = 60
+    EVENT_PUMP_HZ = 60
+    scheduler = FrameScheduler(lambda: render((240,240,240)), pygame.event.pump,
+                               fps=TARGET_FPS, pump_hz=EVENT_PUMP_HZ)
+
+    # run searches in a background thread that streams its state changes to this loop, so the window
+    # keeps its frame rate and the search can be cancelled (ESC or the Run/Cancel button);
+    # set to False to run them inline, drawn through the frame scheduler
+    BACKGROUND_SEARCH = True
+    MAX_BATCHES_PER_FRAME = 64  # state change batches applied per frame while a search streams in
+    worker = None
+    clock = pygame.time.Clock()
+
+    # results of completed searches, so re-running the same algorithm and endpoints on an unchanged
+    # grid (e.g. after Clear Path) paints the stored path at once instead of searching again
+    path_cache = PathCache(maxsize=64)
+    search_key = None  # cache key of the running search
+
+    def path_cells() -> list[tuple[int, int]]:
+        """
+        Get the (row, col) positions of the path painted by the last search.
+        """
+        marker = bytes([STATE_PATH])
+        cells = []
+        i = grid.states.find(marker)
+        while i != -1:
+            cells.append(divmod(i, COLS))
+            i = grid.states.find(marker, i + 1)
+        return cells
+
+    def paint_cached(found: SearchStats, cells: list[tuple[int, int]]) -> None:
+        """
+        Show a cached result: clear the previous search and paint the stored path.
+        """
+        stats['result'], stats['cached'] = found, True
+        grid.clear_path()
+        for row, col in cells:
+            grid.set_state(row, col, STATE_PATH)
+        if not found:
+            print("No path (cached)")
+
+    def run_search():
+        """
+        Run the selected algorithm on the current grid.
+        """
+        global started, worker, search_key
+        name, algo_func = dropdown.options[dropdown.selected]
+        if not start or not end:
+            return
+        if name in HEURISTIC_ALGOS:
+            name = f"{name} ({heuristic['name']})"  # shown in the overlay and part of the cache key
+        search_key = PathCache.key(grid.version, name, start, end)
+        stats['name'] = name
+        cached = path_cache.get(search_key)
+        if cached is not None:
+            paint_cached(*cached)
+            return
+        started = True
+        stats.update(result=None, cached=False, began=time.perf_counter(), drawn=0.0)
+        if BACKGROUND_SEARCH:
+            worker = SearchWorker(algo_func, grid, start, end)
+            worker.start()
+            run_btn.text = "Cancel"
+            return
+        scheduler.start()
+        found = algo_func(scheduler.tick, grid, start, end)
+        scheduler.finish()
+        stats['result'] = found
+        path_cache.put(search_key, (found, path_cells()))
+        started = False
+
+    def update_search():
+        """
+        Apply the state changes streamed by the background search and finish it once it is done.
+        """
+        global started, worker
+        running = worker.is_running()
+        if running and scheduler.unthrottled:
+            return  # render the final state only
+        # catch up at once when only the final state matters (unthrottled or cancelled search)
+        catch_up = scheduler.unthrottled or worker.cancelled
+        began = time.perf_counter()
+        for row, col, state in worker.poll(None if catch_up else MAX_BATCHES_PER_FRAME):
+            grid.set_state(row, col, state)
+        stats['drawn'] += time.perf_counter() - began
+        if running or not worker.events.empty():
+            return
+        if worker.error is not None:
+            print("Search failed:", repr(worker.error))
+        elif worker.cancelled:
+            print("Search cancelled")
+        else:
+            # the worker only timed recording the state changes: report the replay and render time instead
+            stats['result'] = replace(worker.result, draw_seconds=stats['drawn'])
+            path_cache.put(search_key, (stats['result'], path_cells()))
+        worker = None
+        started = False
+        run_btn.text = "Run"
+
+    while run:
+        if worker is not None:
+            update_search()
+        began = time.perf_counter()
+        render((240,240,240) if started else (120, 120, 120))
+        if worker is not None:
+            stats['drawn'] += time.perf_counter() - began
+        clock.tick(TARGET_FPS)
         for event in pygame.event.get():
             # verify what events happened
             if event.type == pygame.QUIT:
                 run = False
+                if worker is not None:
+                    worker.cancel()
 
             if started:
-                # do not allow any other interaction if the algorithm has started
+                # while a search runs in the background, the only allowed interaction is cancelling it
+                if worker is not None:
+                    if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                        worker.cancel()
+                    elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and run_btn.is_clicked(event.pos):
+                        worker.cancel()
                 continue  # ignore other events if algorithm started
 
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -157,41 +397,18 @@ if __name__ == "__main__":
                             clicked_ui = True
 
                     if run_btn.is_clicked(pos):
-                        for row in grid.grid:
-                            for spot in row:
-                                spot.update_neighbors(grid.grid)
-                        started = True
-                        _, algo_func = dropdown.options[dropdown.selected]
-                        def draw_fn():
-                            # pump events to keep window responsive
-                            pygame.event.pump()
-                            draw_state['count'] += 1
-                            if draw_state['count'] % DRAW_THROTTLE == 0:
-                                # redraw grid and UI overlays during algorithm
-                                grid.draw()
-                                # draw UI bar + dropdown/buttons
-                                ui_bar_h = btn_h + margin * 2
-                                pygame.draw.rect(WIN, (240,240,240), (0, 0, WIDTH, ui_bar_h))
-                                dropdown.draw(WIN)
-                                run_btn.draw(WIN)
-                                clear_btn.draw(WIN)
-                                clear_all_btn.draw(WIN)
-                                pygame.display.update()
-                        algo_func(draw_fn, grid, start, end)
-                        started = False
+                        run_search()
                         clicked_ui = True
 
                     if clear_btn.is_clicked(pos):
-                        for r in grid.grid:
-                            for s in r:
-                                if not s.is_barrier() and not s.is_start() and not s.is_end():
-                                    s.reset()
+                        grid.clear_path()
                         clicked_ui = True
 
                     if clear_all_btn.is_clicked(pos):
                         start = None
                         end = None
                         grid.reset()
+                        stats['name'] = None
                         clicked_ui = True
 
                     if clicked_ui:
@@ -209,15 +426,15 @@ if __name__ == "__main__":
                     row, col = grid.get_clicked_pos((grid_x, grid_y))
                     if row < 0 or col < 0 or row >= ROWS or col >= COLS:
                         continue
-                    spot = grid.grid[row][col]
+                    spot = (row, col)
                     if not start and spot != end:
                         start = spot
-                        start.make_start()
+                        grid.set_state(row, col, STATE_START)
                     elif not end and spot != start:
                         end = spot
-                        end.make_end()
+                        grid.set_state(row, col, STATE_END)
                     elif spot != end and spot != start:
-                        spot.make_barrier()
+                        paint(row, col)
 
                 # right click
                 elif event.button == 3:
@@ -228,8 +445,9 @@ if __name__ == "__main__":
                     row, col = grid.get_clicked_pos((grid_x, grid_y))
                     if row < 0 or col < 0 or row >= ROWS or col >= COLS:
                         continue
-                    spot = grid.grid[row][col]
-                    spot.reset()
+                    spot = (row, col)
+                    grid.set_state(row, col, STATE_EMPTY)
+                    grid.set_cost(row, col, 1)
 
                     if spot == start:
                         start = None
@@ -247,38 +465,40 @@ if __name__ == "__main__":
                     row, col = grid.get_clicked_pos((grid_x, grid_y))
                     if row < 0 or col < 0 or row >= ROWS or col >= COLS:
                         continue
-                    spot = grid.grid[row][col]
                     # don't overwrite start/end
-                    if not spot.is_start() and not spot.is_end():
-                        spot.make_barrier()
+                    if grid.get_state(row, col) not in (STATE_START, STATE_END):
+                        paint(row, col)
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE and not started:
                     # run the algorithm
-                    for row in grid.grid:
-                        for spot in row:
-                            spot.update_neighbors(grid.grid)
-                    started = True
-                    # call selected algorithm
-                    _, algo_func = dropdown.options[dropdown.selected]
-                    def draw_fn():
-                        pygame.event.pump()
-                        draw_state['count'] += 1
-                        if draw_state['count'] % DRAW_THROTTLE == 0:
-                            grid.draw()
-                            ui_bar_h = btn_h + margin * 2
-                            pygame.draw.rect(WIN, (240,240,240), (0, 0, WIDTH, ui_bar_h))
-                            dropdown.draw(WIN)
-                            run_btn.draw(WIN)
-                            clear_btn.draw(WIN)
-                            clear_all_btn.draw(WIN)
-                            pygame.display.update()
-                    algo_func(draw_fn, grid, start, end)
-                    started = False
+                    run_search()
+
+                if event.key == pygame.K_u:
+                    scheduler.unthrottled = not scheduler.unthrottled
+                    print("Unthrottled search:", scheduler.unthrottled)
+
+                if pygame.K_0 <= event.key <= pygame.K_9:
+                    brush['cost'] = event.key - pygame.K_0 or None
+                    print("Brush:", f"terrain cost {brush['cost']}" if brush['cost'] else "barriers")
+
+                if event.key == pygame.K_e:
+                    heuristic['name'] = HEURISTICS[(HEURISTICS.index(heuristic['name']) + 1) % len(HEURISTICS)]
+                    print("Heuristic:", heuristic['name'])
+
+                if event.key == pygame.K_s:
+                    save_map(SAVE_PATH, grid.to_grid_map(), start, end)
+                    print("Grid saved to", SAVE_PATH)
+
+                if event.key == pygame.K_h:
+                    heatmap['shown'] = not heatmap['shown']
+                    grid.invalidate()  # repaint the cells under the heat map when it is hidden
 
                 if event.key == pygame.K_c:
                     print("Clearing the grid...")
                     start = None
                     end = None
                     grid.reset()
+    if worker is not None:
+        worker.join(timeout=1.0)
     pygame.quit()
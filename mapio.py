@@ -0,0 +1,164 @@
+"""
+Map files: a compact binary format that is memory-mapped straight into a `GridMap`, and importers
+for the MovingAI benchmark maps (.map) and scenario sets (.scen).
+
+The binary format is a 32-byte little-endian header (magic, format version, flags, rows, cols, start
+and end positions, -1 when unset) followed by the barrier layer, one byte per cell in row-major
+order, and optionally by the neighbor masks (see `engine.neighbor_masks`) and the terrain costs, one
+byte per cell each. The layers are handed to the engine as read-only views of the mapping, so loading
+does not read or parse the cells and the operating system pages them in on first use.
+"""
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+
+from engine import GridMap, neighbor_masks
+
+MAGIC = b'GMAP'
+FORMAT_VERSION = 1
+FLAG_MASKS = 1  # the neighbor mask layer follows the barrier layer
+FLAG_COSTS = 2  # the terrain cost layer follows (after the masks, if any)
+_HEADER = struct.Struct('<4sHHIIiiii')
+
+# MovingAI terrain: '.' and 'G' are ground and 'S' swamp (passable); '@' and 'O' are out of bounds,
+# 'T' trees and 'W' water, none of which a 4-connected ground agent can enter
+_MOVINGAI_BLOCKED = bytes(0 if chr(byte) in '.GS' else 1 for byte in range(256))
+
+
+@dataclass
+class MapFile:
+    gmap: GridMap
+    start: tuple[int, int] | None = None
+    end: tuple[int, int] | None = None
+
+
+@dataclass
+class Scenario:
+    """
+    One query of a MovingAI scenario set. Positions are (row, col), i.e. the file's (y, x).
+    """
+    bucket: int
+    map: str
+    rows: int
+    cols: int
+    start: tuple[int, int]
+    goal: tuple[int, int]
+    optimal: float  # octile (8-connected) length from the file; 4-connected paths can be longer
+
+
+def save_map(path: str, gmap: GridMap, start: tuple[int, int] | None = None, end: tuple[int, int] | None = None,
+             masks: bool = True) -> None:
+    """
+    Write a grid in the binary format.
+    Args:
+        path (str): Output file.
+        gmap (GridMap): The grid; its barriers, neighbor masks and terrain costs are stored.
+        start (tuple[int, int] | None): Optional start position saved with the map.
+        end (tuple[int, int] | None): Optional end position saved with the map.
+        masks (bool): Also store the neighbor masks, so the loaded map needs no preprocessing.
+    """
+    start_row, start_col = start if start is not None else (-1, -1)
+    end_row, end_col = end if end is not None else (-1, -1)
+    flags = (FLAG_MASKS if masks else 0) | (FLAG_COSTS if gmap.costs is not None else 0)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, flags, gmap.rows, gmap.cols,
+                             start_row, start_col, end_row, end_col))
+        f.write(gmap.blocked)
+        if masks:
+            f.write(gmap.masks if gmap.masks is not None else neighbor_masks(gmap.rows, gmap.cols, gmap.blocked))
+        if gmap.costs is not None:
+            f.write(gmap.costs)
+
+
+def load_map(path: str) -> MapFile:
+    """
+    Load a map: MovingAI `.map` files are parsed, anything else is memory-mapped as the binary format.
+    The returned grid reads the file through the mapping, which stays open as long as the grid does.
+    Returns:
+        MapFile: The grid with its start and end positions (None when the file has none).
+    Raises:
+        ValueError: If the file is not a valid map.
+    """
+    if os.path.splitext(path)[1].lower() == '.map':
+        return MapFile(read_movingai_map(path))
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    if len(view) < _HEADER.size:
+        raise ValueError(f"{path}: too short for a map header")
+    magic, version, flags, rows, cols, start_row, start_col, end_row, end_col = _HEADER.unpack_from(view)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{path}: not a version {FORMAT_VERSION} map file")
+    n = rows * cols
+    layers = 1 + bool(flags & FLAG_MASKS) + bool(flags & FLAG_COSTS)
+    if len(view) < _HEADER.size + layers * n:
+        raise ValueError(f"{path}: truncated, expected {layers * n} bytes of cells")
+    offset = _HEADER.size
+    blocked = view[offset:offset + n]
+    masks = costs = None
+    if flags & FLAG_MASKS:
+        offset += n
+        masks = view[offset:offset + n]
+    if flags & FLAG_COSTS:
+        offset += n
+        costs = view[offset:offset + n]
+    return MapFile(GridMap(rows, cols, blocked, masks, costs),
+                   (start_row, start_col) if start_row >= 0 else None,
+                   (end_row, end_col) if end_row >= 0 else None)
+
+
+def read_movingai_map(path: str) -> GridMap:
+    """
+    Parse a MovingAI `.map` file (header with type, height and width, then the `map` line and one line
+    of terrain characters per row). Maps that are loaded often are best converted once with `save_map`,
+    which also stores the neighbor masks.
+    Returns:
+        GridMap: The grid, without neighbor masks.
+    Raises:
+        ValueError: If the header or the rows are malformed.
+    """
+    with open(path, 'rb') as f:
+        lines = f.read().split(b'\n')
+    header = {}
+    for i, line in enumerate(lines):
+        words = line.split()
+        if words == [b'map']:
+            body = lines[i + 1:]
+            break
+        if len(words) == 2:
+            header[words[0].decode()] = words[1].decode()
+    else:
+        raise ValueError(f"{path}: missing 'map' line")
+    try:
+        rows, cols = int(header['height']), int(header['width'])
+    except (KeyError, ValueError):
+        raise ValueError(f"{path}: missing or invalid height/width") from None
+    body = [line.rstrip(b'\r') for line in body[:rows]]
+    if len(body) < rows or any(len(line) != cols for line in body):
+        raise ValueError(f"{path}: expected {rows} rows of {cols} cells")
+    blocked = bytearray(b''.join(body).translate(_MOVINGAI_BLOCKED))
+    return GridMap(rows, cols, blocked)
+
+
+def read_scenarios(path: str) -> list[Scenario]:
+    """
+    Parse a MovingAI `.scen` file: a `version` line, then one tab-separated query per line
+    (bucket, map, width, height, start x, start y, goal x, goal y, optimal length).
+    Returns:
+        list[Scenario]: The queries in file order.
+    Raises:
+        ValueError: If a line is malformed.
+    """
+    scenarios = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields or fields[0] == 'version':
+                continue
+            try:
+                cols, rows, sx, sy, gx, gy = map(int, fields[2:8])
+                scenarios.append(Scenario(int(fields[0]), fields[1], rows, cols, (sy, sx), (gy, gx), float(fields[8])))
+            except (IndexError, ValueError):
+                raise ValueError(f"{path}:{number}: malformed scenario line") from None
+    return scenarios
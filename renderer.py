@@ -0,0 +1,109 @@
+from utils import *
+
+try:
+    import numpy as np
+except ImportError:  # optional: the renderer falls back to pygame.image.frombuffer
+    np = None
+
+
+class PaletteRenderer:
+    """
+    Bulk renderer for large grids. Instead of one `pygame.draw.rect` per cell, the grid's flat state
+    array (one STATE_* byte per cell, see `Grid.states` / `ArrayGrid.states`) is copied into an 8-bit
+    surface with one pixel per cell, whose palette maps every state to its color. That surface is then
+    scaled to the window in a single operation. Grid lines are not drawn.
+    """
+
+    def __init__(self, grid):
+        """
+        Initialize a renderer for the given grid.
+        Args:
+            grid (Grid | ArrayGrid): The grid to draw; it must expose `win`, `rows`, `cols`, `width`,
+                `height` and `states`.
+        """
+        self.grid = grid
+        self.palette: list[tuple] = list(STATE_COLORS) + [COLORS['BLACK']] * (256 - len(STATE_COLORS))
+        # one pixel per cell: x is the row index and y the column index, as in Spot
+        self._cells: pygame.Surface = pygame.Surface((grid.rows, grid.cols), depth=8)
+        self._cells.set_palette(self.palette)
+        self._scaled: pygame.Surface | None = None
+
+    def _fill_cells(self, values) -> None:
+        """
+        Copy one palette index per cell (a row-major buffer, e.g. the grid states) into the
+        one-pixel-per-cell surface.
+        """
+        grid = self.grid
+        if np is not None:
+            values = np.frombuffer(values, dtype=np.uint8).reshape(grid.rows, grid.cols)
+            pygame.surfarray.blit_array(self._cells, values)
+        else:
+            # the buffer is row-major over (row, col), i.e. an image of size (cols, rows): transpose it
+            image = pygame.image.frombuffer(bytes(values), (grid.cols, grid.rows), 'P')
+            image.set_palette(self.palette)
+            image = pygame.transform.flip(pygame.transform.rotate(image, -90), True, False)
+            self._cells.blit(image, (0, 0))
+
+    def draw(self) -> list[pygame.Rect]:
+        """
+        Draw the whole grid on its window.
+        Returns:
+            list[pygame.Rect]: The drawn area in display coordinates, for pygame.display.update().
+        """
+        self.grid.mark_drawn()  # every change so far is on screen: the grid need not track them
+        return self._blit(self.grid.states)
+
+    def _blit(self, values) -> list[pygame.Rect]:
+        """
+        Draw one palette index per cell, scaled to the window.
+        """
+        grid = self.grid
+        size = (grid.width, grid.height)
+        if self._scaled is None or self._scaled.get_size() != size:
+            self._scaled = pygame.Surface(size, depth=8)
+            self._scaled.set_palette(self.palette)
+        self._fill_cells(values)
+        pygame.transform.scale(self._cells, size, self._scaled)
+        grid.win.blit(self._scaled, (0, 0))
+        ox, oy = grid.win.get_abs_offset()
+        return [pygame.Rect(ox, oy, grid.width, grid.height)]
+
+
+class HeatmapRenderer(PaletteRenderer):
+    """
+    Draws a distance field (see `engine.distance_field`) over the grid as a heat map, from yellow
+    near the target to dark blue at the largest distance. Barriers and unreachable cells are black.
+    """
+
+    LEVELS = 255  # palette entries used for distances; entry 255 is for unreachable cells
+
+    def __init__(self, grid):
+        super().__init__(grid)
+        self.palette = [self._level_color(i / (self.LEVELS - 1)) for i in range(self.LEVELS)] + [COLORS['BLACK']]
+        self._cells.set_palette(self.palette)
+
+    @staticmethod
+    def _level_color(x: float) -> tuple[int, int, int]:
+        near, far = (255, 230, 40), (20, 20, 120)
+        return tuple(round(a + (b - a) * x) for a, b in zip(near, far))
+
+    def draw_field(self, field) -> list[pygame.Rect]:
+        """
+        Draw a distance field on the grid's window.
+        Args:
+            field (array): One distance per cell in row-major order, UNREACHABLE (-1) for cells that
+                cannot reach the target.
+        Returns:
+            list[pygame.Rect]: The drawn area in display coordinates, for pygame.display.update().
+        """
+        # the heat map covers the grid: drop its pending changes and redraw it whole once it is shown again
+        self.grid.invalidate()
+        self.grid.mark_drawn()
+        top, unreachable = self.LEVELS - 1, self.LEVELS
+        if np is not None:
+            dist = np.array(field, dtype=np.int64)
+            far = max(int(dist.max()), 1)
+            levels = np.where(dist < 0, unreachable, dist * top // far).astype(np.uint8)
+            return self._blit(levels.tobytes())
+        far = max(max(field), 1)
+        return self._blit(bytes(unreachable if d < 0 else d * top // far for d in field))
@@ -0,0 +1,70 @@
+import time
+
+
+class FrameScheduler:
+    """
+    Decides, from wall-clock time, when a running search should redraw and pump window events.
+
+    `tick()` is meant to be passed as the `draw` callback of the search algorithms: it is called on
+    every step, but only renders when a frame is due at the target FPS and only pumps events at a
+    fixed interval. The real frame rate therefore no longer depends on how fast the algorithm steps.
+    """
+
+    def __init__(self, render: callable, pump: callable, fps: float = 60, pump_hz: float = 60,
+                 unthrottled: bool = False, clock: callable = time.perf_counter):
+        """
+        Initialize a scheduler.
+        Args:
+            render (callable): Draws a frame.
+            pump (callable): Processes pending window events (e.g. pygame.event.pump).
+            fps (float): Target frame rate while the search runs.
+            pump_hz (float): How many times per second events are pumped, also when unthrottled.
+            unthrottled (bool): If True, never render during the search; only `finish()` renders.
+            clock (callable): Returns the current time in seconds.
+        """
+        self.render = render
+        self.pump = pump
+        self.frame_interval: float = 1.0 / fps
+        self.pump_interval: float = 1.0 / pump_hz
+        self.unthrottled: bool = unthrottled
+        self.clock = clock
+        self.frames: int = 0  # frames rendered since start()
+        self.steps: int = 0   # tick() calls since start()
+        self._next_frame: float = 0.0
+        self._next_pump: float = 0.0
+
+    def start(self) -> None:
+        """
+        Reset the counters and render the first frame at the next tick.
+        Returns:
+            None
+        """
+        self.frames = 0
+        self.steps = 0
+        self._next_frame = self._next_pump = self.clock()
+
+    def tick(self) -> None:
+        """
+        Called on every step of the search: pumps events and renders a frame when they are due.
+        Returns:
+            None
+        """
+        self.steps += 1
+        now = self.clock()
+        if now >= self._next_pump:
+            self.pump()
+            self._next_pump = now + self.pump_interval
+        if not self.unthrottled and now >= self._next_frame:
+            self.render()
+            self.frames += 1
+            # schedule from the end of the frame so a slow render does not cause back-to-back frames
+            self._next_frame = self.clock() + self.frame_interval
+
+    def finish(self) -> None:
+        """
+        Render the final state of the search.
+        Returns:
+            None
+        """
+        self.render()
+        self.frames += 1
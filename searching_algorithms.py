@@ -1,103 +1,141 @@
 from utils import *
-from collections import deque
-from queue import PriorityQueue
 import math
+import time
+from dataclasses import dataclass
+import engine
+from engine import EVENT_STEP, EVENT_OPEN, EVENT_CLOSE, EVENT_PATH, EVENT_RESET
 from grid import Grid
+from incremental import LPAStar
+from landmarks import Landmarks
+from hpa import HPAPlanner
 from spot import Spot
 
+# The searches themselves live in the headless `engine` module. The functions below keep the
+# visualizer signature `algo(draw, grid, start, end)` and replay the engine's events on the grid,
+# calling `draw()` the same way the original loops did. `grid` can be a `Grid` or an `ArrayGrid`;
+# `start` and `end` can be Spots or (row, col) positions. They return a `SearchStats`, which is
+# truthy when a path was found, so it can still be used as the old bool result.
 
-def bfs(draw: callable, grid: Grid, start: Spot, end: Spot) -> bool:
-    if not start or not end:
-        return False
-    queue = deque([start])
-    previous = {start: None}
-    while queue:
-        draw()
-        current = queue.popleft()
-        if current == end:
-            while current in previous and previous[current]:
-                current = previous[current]
-                current.make_path(); draw()
-            end.make_end(); start.make_start()
-            return True
-        for neighbor in current.neighbors:
-            if neighbor not in previous:
-                previous[neighbor] = current
-                queue.append(neighbor)
-                neighbor.make_open()
-        if current != start:
-            current.make_closed()
-    return False
-
-
-def dfs(draw: callable, grid: Grid, start: Spot, end: Spot) -> bool:
-    if not start or not end:
-        return False
-    stack = [start]
-    previous = {start: None}
-    while stack:
-        draw()
-        current = stack.pop()
-        if current == end:
-            while current in previous and previous[current]:
-                current = previous[current]
-                current.make_path(); draw()
-            end.make_end(); start.make_start()
-            return True
-        for neighbor in current.neighbors:
-            if neighbor not in previous:
-                previous[neighbor] = current
-                stack.append(neighbor)
-                neighbor.make_open()
-        if current != start:
-            current.make_closed()
-    return False
-
-
-def dls(draw: callable, grid: Grid, start: Spot, end: Spot, limit: int | None = None) -> bool:
+_EVENT_STATES = {
+    EVENT_OPEN: STATE_OPEN,
+    EVENT_CLOSE: STATE_CLOSED,
+    EVENT_PATH: STATE_PATH,
+    EVENT_RESET: STATE_EMPTY,
+}
+
+
+def _position(p) -> tuple[int, int]:
+    if isinstance(p, Spot):
+        return p.get_position()
+    return p
+
+
+@dataclass
+class SearchStats:
     """
-    Depth-Limited Search (iterative, depth-aware revisits).
-    If `limit` is None, we use a safe upper bound = rows * cols (covers any simple path).
+    Counters of one visualizer search. Time spent coloring cells and in `draw()` is counted as draw
+    time, the rest of the wall time as search time. On a `worker.SearchWorker` the observer only
+    records the state changes, so the visualizer replaces `draw_seconds` with the time it spent
+    replaying and rendering them.
     """
-    if not start or not end:
-        return False
+    found: bool = False
+    expanded: int = 0        # nodes taken off the frontier and expanded
+    pushes: int = 0          # frontier insertions, including decrease-keys
+    stale_skipped: int = 0   # outdated frontier entries popped and thrown away
+    stale_avoided: int = 0   # outdated frontier entries never popped (see frontier.HeapFrontier)
+    peak_open: int = 0       # largest open set size
+    path_length: int = 0     # moves in the reconstructed path
+    path_cost: float = 0.0   # their summed terrain costs (the path length on plain ground)
+    search_seconds: float = 0.0
+    draw_seconds: float = 0.0
+
+    def __bool__(self) -> bool:
+        return self.found
+
+    @property
+    def total_seconds(self) -> float:
+        return self.search_seconds + self.draw_seconds
+
+    @classmethod
+    def from_result(cls, result: engine.SearchResult, seconds: float, draw_seconds: float) -> "SearchStats":
+        """
+        Build the stats of a search from its engine result and timings.
+        Args:
+            result (SearchResult): What the engine search returned.
+            seconds (float): Wall time of the whole search, drawing included.
+            draw_seconds (float): The part of `seconds` spent in the observer.
+        """
+        return cls(result.found, result.expanded, result.generated, result.stale_skipped, result.stale_avoided,
+                   result.peak_frontier, max(len(result.path) - 1, 0), result.cost if result.found else 0.0,
+                   max(seconds - draw_seconds, 0.0), draw_seconds)
+
+
+class _Timed:
+    """
+    Observer wrapper that adds up the time spent in the wrapped observer.
+    """
+
+    def __init__(self, observe: callable):
+        self._observe = observe
+        self.seconds: float = 0.0
+
+    def __call__(self, event: int, cell: int) -> None:
+        began = time.perf_counter()
+        try:
+            self._observe(event, cell)
+        finally:
+            self.seconds += time.perf_counter() - began
 
-    if limit is None:
-        rows = len(grid.grid)
-        cols = len(grid.grid[0]) if rows else 0
-        limit = rows * cols  # big enough to not stop before reaching goal
 
-    stack = [(start, 0)]
-    previous = {start: None}
-    seen_depth: dict[Spot, int] = {start: 0}
+def _painter(draw: callable, grid: Grid, start: tuple[int, int], end: tuple[int, int]) -> callable:
+    """
+    Build an engine observer that colors the cells of `grid` and calls `draw()`.
+    Start and end are never recolored.
+    """
+    set_state = grid.set_state
+    cols = grid.cols
+    s = start[0] * cols + start[1]
+    t = end[0] * cols + end[1]
+
+    def observe(event: int, cell: int) -> None:
+        if event == EVENT_STEP:
+            draw()
+            return
+        if cell == s or cell == t:
+            return
+        row, col = divmod(cell, cols)
+        set_state(row, col, _EVENT_STATES[event])
+        if event == EVENT_PATH:
+            draw()
+
+    return observe
+
+
+def _run(search: callable, draw: callable, grid: Grid, start: Spot, end: Spot, **kwargs) -> SearchStats:
+    if not start or not end:
+        return SearchStats()
+    start, end = _position(start), _position(end)
+    painter = _Timed(_painter(draw, grid, start, end))
+    began = time.perf_counter()
+    result = search(grid.to_grid_map(), start, end, observer=painter, **kwargs)
+    grid.set_state(*end, STATE_END); grid.set_state(*start, STATE_START)
+    return SearchStats.from_result(result, time.perf_counter() - began, painter.seconds)
 
-    while stack:
-        draw()
-        current, depth = stack.pop()
 
-        if current == end:
-            while current in previous and previous[current]:
-                current = previous[current]
-                current.make_path(); draw()
-            end.make_end(); start.make_start()
-            return True
+def bfs(draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+    return _run(engine.bfs, draw, grid, start, end)
 
-        if depth == limit:
-            continue
 
-        for nb in current.neighbors:
-            nd = depth + 1
-            # allow (re)visit if we found a shallower depth within the limit
-            if nd <= limit and (nb not in seen_depth or nd < seen_depth[nb]):
-                seen_depth[nb] = nd
-                previous[nb] = current
-                stack.append((nb, nd))
-                nb.make_open()
+def dfs(draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+    return _run(engine.dfs, draw, grid, start, end)
 
-        if current != start:
-            current.make_closed()
 
-    return False
+def dls(draw: callable, grid: Grid, start: Spot, end: Spot, limit: int | None = None) -> SearchStats:
+    """
+    Depth-Limited Search (iterative, depth-aware revisits).
+    If `limit` is None, we use a safe upper bound = rows * cols (covers any simple path).
+    """
+    return _run(engine.dls, draw, grid, start, end, limit=limit)
 
 
 def h_manhattan_distance(p1, p2) -> float:
@@ -120,197 +158,168 @@ def h_euclidian_distance(p1, p2) -> float:
     return float(math.hypot(x1 - x2, y1 - y2))
 
 
-def astar(draw: callable, grid: Grid, start: Spot, end: Spot) -> bool:
-    if not start or not end:
-        return False
-
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))
-    previous = {start: None}
-    g_score: dict[Spot, float] = {start: 0.0}
-    closed: set[Spot] = set()
-
-    while not open_set.empty():
-        draw()
-        _, _, current = open_set.get()
-        if current in closed:
-            continue
-
-        if current == end:
-            while current in previous and previous[current]:
-                current = previous[current]
-                current.make_path(); draw()
-            end.make_end(); start.make_start()
-            return True
-
-        closed.add(current)
-
-        for neighbor in current.neighbors:
-            tentative = g_score[current] + 1  # unit edge cost
-            if tentative < g_score.get(neighbor, float('inf')):
-                previous[neighbor] = current
-                g_score[neighbor] = tentative
-                f = tentative + h_manhattan_distance(neighbor, end)
-                count += 1
-                open_set.put((f, count, neighbor))  # always push on improvement
-                neighbor.make_open()
-
-        if current != start:
-            current.make_closed()
-
-    return False
-
-
-def ucs(draw: callable, grid: Grid, start: Spot, end: Spot) -> bool:
+def astar(draw: callable, grid: Grid, start: Spot, end: Spot, heuristic: str = 'manhattan') -> SearchStats:
     """
-    Dijkstra/UCS with decrease-key via reinsert and stale-pop skipping.
+    A* with a heuristic from `engine.HEURISTICS`, combined from per-axis distances to the end cell.
     """
+    return _run(engine.astar, draw, grid, start, end, heuristic=heuristic)
+
+
+# landmark tables of the last grid searched with ALT, reused until its barriers change
+_landmarks: Landmarks | None = None
+ALT_LANDMARKS = 8
+
+
+def _alt_heuristic(gmap: engine.GridMap) -> callable:
+    global _landmarks
+    if _landmarks is None or not _landmarks.matches(gmap):
+        _landmarks = Landmarks(gmap, ALT_LANDMARKS)
+    return _landmarks.heuristic
+
+
+def _run_alt(search: callable, draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
     if not start or not end:
-        return False
-
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))
-    previous = {start: None}
-    g_score: dict[Spot, float] = {start: 0.0}
-    closed: set[Spot] = set()
-
-    while not open_set.empty():
-        draw()
-        _, _, current = open_set.get()
-        if current in closed:
-            continue
-
-        if current == end:
-            while current in previous and previous[current]:
-                current = previous[current]
-                current.make_path(); draw()
-            end.make_end(); start.make_start()
-            return True
-
-        closed.add(current)
-
-        for neighbor in current.neighbors:
-            tentative = g_score[current] + 1
-            if tentative < g_score.get(neighbor, float('inf')):
-                previous[neighbor] = current
-                g_score[neighbor] = tentative
-                count += 1
-                open_set.put((g_score[neighbor], count, neighbor))  # priority = g
-                neighbor.make_open()
-
-        if current != start:
-            current.make_closed()
-
-    return False
-
-
-def greedy_search(draw: callable, grid: Grid, start: Spot, end: Spot) -> bool:
-    if not start or not end:
-        return False
-
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((h_manhattan_distance(start, end), count, start))
-    previous = {start: None}
-    visited = set()
-
-    while not open_set.empty():
-        draw()
-        _, _, current = open_set.get()
-        if current in visited:
-            continue
-        visited.add(current)
-
-        if current == end:
-            while current in previous and previous[current]:
-                current = previous[current]
-                current.make_path(); draw()
-            end.make_end(); start.make_start()
-            return True
-
-        for neighbor in current.neighbors:
-            if neighbor not in previous:
-                previous[neighbor] = current
-                count += 1
-                open_set.put((h_manhattan_distance(neighbor, end), count, neighbor))
-                neighbor.make_open()
-
-        if current != start:
-            current.make_closed()
-
-    return False
-
-
-def ids(draw: callable, grid: Grid, start: Spot, end: Spot, max_depth: int | None = None) -> bool:
+        return SearchStats()
+    start, end = _position(start), _position(end)
+    painter = _Timed(_painter(draw, grid, start, end))
+    began = time.perf_counter()  # the landmark tables, when rebuilt, count as search time
+    gmap = grid.to_grid_map()
+    result = search(gmap, start, end, observer=painter, heuristic=_alt_heuristic(gmap))
+    grid.set_state(*end, STATE_END); grid.set_state(*start, STATE_START)
+    return SearchStats.from_result(result, time.perf_counter() - began, painter.seconds)
+
+
+def astar_alt(draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+    """
+    A* with the ALT landmark heuristic instead of Manhattan distance.
+    """
+    return _run_alt(engine.astar, draw, grid, start, end)
+
+
+def ucs(draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+    """
+    Dijkstra/UCS on a decrease-key frontier (no stale pops); a bucket queue when the grid has terrain costs.
+    """
+    return _run(engine.ucs, draw, grid, start, end)
+
+
+def greedy_search(draw: callable, grid: Grid, start: Spot, end: Spot, heuristic: str = 'manhattan') -> SearchStats:
+    return _run(engine.greedy_search, draw, grid, start, end, heuristic=heuristic)
+
+
+def ids(draw: callable, grid: Grid, start: Spot, end: Spot, max_depth: int | None = None) -> SearchStats:
     """
     Iterative Deepening DFS using the fixed DLS.
-    If max_depth is None, use rows*cols as a safe bound.
+    If max_depth is None, use 2 * (rows + cols) as the bound.
     """
-    if max_depth is None:
-        rows = len(grid.grid)
-        cols = len(grid.grid[0]) if rows else 0
-        max_depth = 2*(rows + cols)
-
-    for depth in range(max_depth + 1):
-        # clear visualization (keep barriers/start/end)
-        for row in grid.grid:
-            for spot in row:
-                if spot != start and spot != end and not spot.is_barrier():
-                    spot.reset()
-        if dls(draw, grid, start, end, limit=depth):
-            return True
-    return False
-
-
-def ida_star(draw: callable, grid: Grid, start: Spot, end: Spot) -> bool:
-    def search(path: list[Spot], g: float, threshold: float) -> tuple[bool, float]:
-        current = path[-1]
-        draw()
-        f = g + h_manhattan_distance(current, end)
-        if f > threshold:
-            return False, f
-        if current == end:
-            for s in path[1:-1]:
-                s.make_path(); draw()
-            return True, f
-
-        min_threshold = float('inf')
-        current.make_closed()
-
-        for neighbor in current.neighbors:
-            if neighbor in path:
-                continue
-            path.append(neighbor)
-            neighbor.make_open()
-            found, new_thr = search(path, g + 1, threshold)
-            if found:
-                return True, new_thr
-            if new_thr < min_threshold:
-                min_threshold = new_thr
-            path.pop()
-            if neighbor != end:
-                neighbor.reset()
-        return False, min_threshold
+    return _run(engine.ids, draw, grid, start, end, max_depth=max_depth)
 
-    if not start or not end:
-        return False
-
-    threshold = h_manhattan_distance(start, end)
-    path = [start]
-
-    while True:
-        # reset visuals (keep barriers/start/end)
-        for row in grid.grid:
-            for s in row:
-                if s != start and s != end and not s.is_barrier():
-                    s.reset()
-
-        found, threshold = search(path, 0, threshold)
-        if found:
-            end.make_end(); start.make_start()
-            return True
-        if threshold == float('inf'):
-            return False
-        # continue with raised threshold
+
+def ida_star(draw: callable, grid: Grid, start: Spot, end: Spot, transpositions: int | None = None,
+             heuristic: str = 'manhattan') -> SearchStats:
+    """
+    IDA* (explicit stack). With `transpositions`, cells reached again at no better depth within one
+    threshold are skipped, see `engine.ida_star`. The heuristic is chosen as for `astar`.
+    """
+    return _run(engine.ida_star, draw, grid, start, end, transpositions=transpositions, heuristic=heuristic)
+
+
+def ida_star_alt(draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+    """
+    IDA* with the ALT landmark heuristic instead of Manhattan distance.
+    """
+    return _run_alt(engine.ida_star, draw, grid, start, end)
+
+
+def jps(draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+    """
+    Jump Point Search (4-connected): same paths as A*, but only jump points are opened and closed.
+    """
+    return _run(engine.jps, draw, grid, start, end)
+
+
+def bidirectional_bfs(draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+    """
+    BFS grown from both ends one layer at a time, always on the smaller side.
+    """
+    return _run(engine.bidirectional_bfs, draw, grid, start, end)
+
+
+def bidirectional_astar(draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+    """
+    A* grown from both ends with consistent average potentials; returns the same path length as A*.
+    """
+    return _run(engine.bidirectional_astar, draw, grid, start, end)
+
+
+class IncrementalPlanner:
+    """
+    LPA* for the visualizer: same signature as the functions above, but the planner is kept between
+    runs. Register `on_edit` with `grid.add_edit_listener` so that, as long as start and end do not
+    move, the next run only repairs the previous search around the edited cells.
+    """
+
+    def __init__(self):
+        self.planner: LPAStar | None = None
+        self._pending: set[int] = set()  # barrier edits since the last run
+        self._last_path: list[tuple[int, int]] = []
+
+    def on_edit(self, cell: int) -> None:
+        self._pending.add(cell)
+
+    def __call__(self, draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+        if not start or not end:
+            return SearchStats()
+        start, end = _position(start), _position(end)
+        began = time.perf_counter()
+        gmap = grid.to_grid_map()
+        planner = self.planner
+        if (planner is None or (planner.start, planner.goal) != (start, end)
+                or (planner.gmap.rows, planner.gmap.cols) != (gmap.rows, gmap.cols)):
+            planner = self.planner = LPAStar(gmap, start, end)
+            self._last_path = []
+        else:
+            planner.update_cells(self._pending, gmap.blocked)
+            # the old path cells were expanded by the previous run, unless they have since become barriers
+            blocked, cols = gmap.blocked, gmap.cols
+            for row, col in self._last_path[1:-1]:
+                if not blocked[row * cols + col]:
+                    grid.set_state(row, col, STATE_CLOSED)
+        self._pending.clear()
+        painter = _Timed(_painter(draw, grid, start, end))
+        result = planner.search(observer=painter)
+        self._last_path = result.path
+        grid.set_state(*end, STATE_END); grid.set_state(*start, STATE_START)
+        return SearchStats.from_result(result, time.perf_counter() - began, painter.seconds)
+
+
+class HierarchicalPlanner:
+    """
+    HPA* for the visualizer. Like `IncrementalPlanner`, register `on_edit` with the grid: the cluster
+    abstraction is kept between runs and only the clusters touched by barrier edits are rebuilt.
+    """
+
+    def __init__(self, cluster_size: int = 32):
+        self.cluster_size: int = cluster_size
+        self.planner: HPAPlanner | None = None
+        self._pending: set[int] = set()  # barrier edits since the last run
+
+    def on_edit(self, cell: int) -> None:
+        self._pending.add(cell)
+
+    def __call__(self, draw: callable, grid: Grid, start: Spot, end: Spot) -> SearchStats:
+        if not start or not end:
+            return SearchStats()
+        start, end = _position(start), _position(end)
+        began = time.perf_counter()
+        gmap = grid.to_grid_map()
+        planner = self.planner
+        if planner is None or (planner.gmap.rows, planner.gmap.cols) != (gmap.rows, gmap.cols):
+            planner = self.planner = HPAPlanner(gmap, self.cluster_size)
+        else:
+            planner.update_cells(self._pending, gmap.blocked)
+        self._pending.clear()
+        painter = _Timed(_painter(draw, grid, start, end))
+        result = planner.search(start, end, observer=painter)
+        grid.set_state(*end, STATE_END); grid.set_state(*start, STATE_START)
+        return SearchStats.from_result(result, time.perf_counter() - began, painter.seconds)
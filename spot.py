@@ -1,8 +1,11 @@
 from utils import *
 
 class Spot:
+    # a grid can hold millions of spots: no per-instance __dict__
+    __slots__ = ('row', 'col', 'width', 'height', 'x', 'y', 'state', 'total_rows', 'owner')
+
     # --- Constructor ---
-    def __init__(self, row: int, col: int, width: int, height: int, total_rows: int):
+    def __init__(self, row: int, col: int, width: int, height: int, total_rows: int, owner=None):
         """
         Initialize a spot in the grid.
         Args: 
@@ -11,6 +14,7 @@ class Spot:
             width (int): The width of the spot.
             height (int): The height of the spot.
             total_rows (int): Keeps track of the total number of rows in the grid (while avoiding global variables).
+            owner (Grid | None): The grid notified when the state of the spot changes, if any.
         """
         # a square has a position in the grid (row, col) and a position in the window (x, y)
         self.row: int = row
@@ -21,11 +25,18 @@ class Spot:
         self.height: int = height
         self.x: int = row * width
         self.y: int = col * height
-        self.color: tuple = (120, 120, 120)  # default background grey
-        self.neighbors: list = []
+        self.state: int = STATE_EMPTY  # one of the STATE_* codes from utils
         self.total_rows: int = total_rows
+        self.owner = owner
+
+    # ---- Methods to read the state of the spot (i.e., its getters) ----
+    @property
+    def color(self) -> tuple:
+        """
+        The color used to render the spot, looked up from its state.
+        """
+        return STATE_COLORS[self.state]
 
-    # ---- Methods to change the state of the spot (i.e., its setters) ----
     def get_position(self) -> tuple[int, int]:
         """
         Gets the (row, col) position of the spot in the grid.
@@ -40,7 +51,7 @@ class Spot:
         Returns:
             bool: True if the spot is closed (blue), False otherwise.
         """
-        return self.color == (0, 102, 204)
+        return self.state == STATE_CLOSED
 
     def is_open(self) -> bool:
         """
@@ -48,7 +59,7 @@ class Spot:
         Returns:
             bool: True if the spot is marked as open (cyan), False otherwise.
         """
-        return self.color == (0, 255, 255)
+        return self.state == STATE_OPEN
 
     def is_barrier(self) -> bool:
         """
@@ -56,7 +67,7 @@ class Spot:
         Returns:
             bool: True if the spot is a barrier (dark grey), False otherwise.
         """
-        return self.color == (50, 50, 50)
+        return self.state == STATE_BARRIER
 
     def is_start(self) -> bool:
         """
@@ -64,7 +75,7 @@ class Spot:
         Returns:
             bool: True if the spot is the start node (orange), False otherwise.
         """
-        return self.color == (255, 165, 0)
+        return self.state == STATE_START
 
     def is_end(self) -> bool:
         """
@@ -72,16 +83,29 @@ class Spot:
         Returns:
             bool: True if the spot is the end node (red), False otherwise.
         """
-        return self.color == (255, 0, 0)
+        return self.state == STATE_END
 
     # ---- Methods to change the state of the spot (i.e., its setters) ----
+    def set_state(self, state: int) -> None:
+        """
+        Change the state of the spot and notify the owning grid, if any.
+        Args:
+            state (int): One of the STATE_* codes from utils.
+        Returns:
+            None
+        """
+        old = self.state
+        self.state = state
+        if self.owner is not None and old != state:
+            self.owner.on_spot_changed(self, old)
+
     def reset(self) -> None:
         """
         Change the color of the spot back to grey (unvisited).
         Returns:
             None
         """
-        self.color = (120, 120, 120)
+        self.set_state(STATE_EMPTY)
 
     def make_closed(self) -> None:
         """
@@ -89,7 +113,7 @@ class Spot:
         Returns:
             None
         """
-        self.color = (0, 102, 204)
+        self.set_state(STATE_CLOSED)
 
     def make_open(self) -> None:
         """
@@ -97,7 +121,7 @@ class Spot:
         Returns:
             None
         """
-        self.color = (0, 255, 255)
+        self.set_state(STATE_OPEN)
 
     def make_barrier(self) -> None:
         """
@@ -105,7 +129,7 @@ class Spot:
         Returns:
             None
         """
-        self.color = (50, 50, 50)
+        self.set_state(STATE_BARRIER)
 
     def make_start(self) -> None:
         """
@@ -113,7 +137,7 @@ class Spot:
         Returns:
             None
         """
-        self.color = (255, 165, 0)
+        self.set_state(STATE_START)
 
     def make_end(self) -> None:
         """
@@ -121,7 +145,7 @@ class Spot:
         Returns:
             None
         """
-        self.color = (255, 0, 0)
+        self.set_state(STATE_END)
 
     def make_path(self) -> None:
         """
@@ -129,7 +153,7 @@ class Spot:
         Returns:
             None
         """
-        self.color = (255, 255, 0)
+        self.set_state(STATE_PATH)
 
     # --- Operators ---
     def __lt__(self, other: "Spot") -> bool:
@@ -147,25 +171,3 @@ class Spot:
             win (pygame.Surface): The Pygame surface (window) where the spot will be drawn.
         """
         pygame.draw.rect(win, self.color, (self.x, self.y, self.width, self.width))
-
-    def update_neighbors(self, grid: list[list["Spot"]]) -> None:
-        """
-        Update the list of neighbor spots that are not barriers.
-        Args:
-            grid (list[list[Spot]]): The 2D list (matrix) representing the grid of Spot objects.
-        Returns:
-            None
-        """
-        self.neighbors = []
-        # DOWN
-        if self.row < self.total_rows - 1 and not grid[self.row + 1][self.col].is_barrier():
-            self.neighbors.append(grid[self.row + 1][self.col])
-        # UP
-        if self.row > 0 and not grid[self.row - 1][self.col].is_barrier():
-            self.neighbors.append(grid[self.row - 1][self.col])
-        # RIGHT
-        if self.col < self.total_rows - 1 and not grid[self.row][self.col + 1].is_barrier():
-            self.neighbors.append(grid[self.row][self.col + 1])
-        # LEFT
-        if self.col > 0 and not grid[self.row][self.col - 1].is_barrier():
-            self.neighbors.append(grid[self.row][self.col - 1])
@@ -17,4 +17,39 @@ COLORS = {
     'ORANGE': (255, 165 ,0),      # nodes being considered
     'GREY': (128, 128, 128),      # grid lines
     'TURQUOISE': (64, 224, 208)   # neighbor nodes
-}
\ No newline at end of file
+}
+
+# cell states, stored as small integers in Spot.state.
+# the colors below are only used to render a state; the logic never compares colors.
+STATE_EMPTY = 0
+STATE_BARRIER = 1
+STATE_START = 2
+STATE_END = 3
+STATE_OPEN = 4
+STATE_CLOSED = 5
+STATE_PATH = 6
+
+STATE_COLORS = (
+    (120, 120, 120),  # STATE_EMPTY: default background grey
+    (50, 50, 50),     # STATE_BARRIER: dark grey
+    (255, 165, 0),    # STATE_START: orange
+    (255, 0, 0),      # STATE_END: red
+    (0, 255, 255),    # STATE_OPEN: cyan
+    (0, 102, 204),    # STATE_CLOSED: blue
+    (255, 255, 0),    # STATE_PATH: yellow
+)
+
+# terrain costs (cost of moving into a cell, see engine.GridMap): plain ground costs 1, and empty
+# cells get darker and browner up to MAX_TERRAIN_COST, the highest cost painted in the visualizer
+MAX_TERRAIN_COST = 9
+TERRAIN_COLOR = (101, 67, 33)  # color of the most expensive terrain
+
+
+def terrain_color(cost: int) -> tuple:
+    """
+    Get the color of an empty cell with the given terrain cost.
+    """
+    if cost <= 1:
+        return STATE_COLORS[STATE_EMPTY]
+    t = (min(cost, MAX_TERRAIN_COST) - 1) / (MAX_TERRAIN_COST - 1)
+    return tuple(round(a + (b - a) * t) for a, b in zip(STATE_COLORS[STATE_EMPTY], TERRAIN_COLOR))
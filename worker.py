@@ -0,0 +1,126 @@
+import queue
+import threading
+
+from engine import GridMap
+
+
+class SearchCancelled(Exception):
+    """
+    Raised inside a search running on a SearchWorker to stop it after cancel() was called.
+    """
+
+
+class _RecordingGrid:
+    """
+    Stand-in for a Grid inside the worker thread: the searches read a snapshot of the real grid and
+    every state change they make is recorded instead of applied, to be replayed by the UI thread.
+    """
+
+    def __init__(self, worker: "SearchWorker", gmap: GridMap):
+        self.rows: int = gmap.rows
+        self.cols: int = gmap.cols
+        self._worker = worker
+        self._gmap = gmap
+
+    def to_grid_map(self) -> GridMap:
+        return self._gmap
+
+    def set_state(self, row: int, col: int, state: int) -> None:
+        self._worker._record(row, col, state)
+
+
+class SearchWorker:
+    """
+    Runs one visualizer search (`algo(draw, grid, start, end)`, see `searching_algorithms`) in a
+    background thread. The grid is snapshotted when the worker is created; the state changes made by
+    the search are streamed back in batches through `events`, which the UI thread drains with
+    `poll()` and applies to the real grid at its own frame rate.
+    """
+
+    BATCH_SIZE = 256  # state changes per queue item
+
+    def __init__(self, algo: callable, grid, start, end):
+        """
+        Prepare a search. Must be called from the thread that owns `grid`.
+        Args:
+            algo (callable): A search with the `algo(draw, grid, start, end)` signature, returning a
+                `SearchStats` or a bool.
+            grid (Grid | ArrayGrid): The grid to search; only read here, through `to_grid_map()`.
+            start: The start Spot or (row, col) position.
+            end: The end Spot or (row, col) position.
+        """
+        self.events: queue.SimpleQueue = queue.SimpleQueue()
+        self.found: bool | None = None  # result of the search, None until it completed
+        self.result = None  # what the search returned (a SearchStats), None until it completed
+        self.cancelled: bool = False
+        self.error: BaseException | None = None
+        self._algo = algo
+        self._grid = _RecordingGrid(self, grid.to_grid_map())
+        self._start = start
+        self._end = end
+        self._batch: list[tuple[int, int, int]] = []
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="search-worker", daemon=True)
+
+    # ---- UI thread ----
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """
+        Ask the search to stop at its next step.
+        Returns:
+            None
+        """
+        self._cancel.set()
+
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def poll(self, max_batches: int | None = None) -> list[tuple[int, int, int]]:
+        """
+        Take the state changes streamed so far.
+        Args:
+            max_batches (int | None): Stop after this many batches (None takes everything queued).
+        Returns:
+            list[tuple[int, int, int]]: (row, col, state) changes, in the order the search made them.
+        """
+        changes = []
+        while max_batches is None or max_batches > 0:
+            try:
+                changes.extend(self.events.get_nowait())
+            except queue.Empty:
+                break
+            if max_batches is not None:
+                max_batches -= 1
+        return changes
+
+    # ---- worker thread ----
+    def _record(self, row: int, col: int, state: int) -> None:
+        self._batch.append((row, col, state))
+        if len(self._batch) >= self.BATCH_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._batch:
+            self.events.put(self._batch)
+            self._batch = []
+
+    def _draw(self) -> None:
+        # called by the search on every step: the cancellation point
+        if self._cancel.is_set():
+            raise SearchCancelled()
+
+    def _run(self) -> None:
+        try:
+            self.result = self._algo(self._draw, self._grid, self._start, self._end)
+            self.found = bool(self.result)
+        except SearchCancelled:
+            self.cancelled = True
+        except BaseException as e:  # reported to the UI thread instead of dying silently
+            self.error = e
+        finally:
+            self._flush()